@@ -0,0 +1,53 @@
+"""
+Conditional Requests
+ETags derived from the per-user data version, and If-None-Match handling
+for the read endpoints.
+"""
+import hashlib
+
+from fastapi import Response
+
+# Clients may keep a copy but must revalidate it (cheap: 304 without a body)
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(user_email: str, version: int, variant: str = None) -> str:
+    """
+    Strong ETag for a user's data at a given version.
+
+    Args:
+        user_email: Email of the authenticated user (hashed, never exposed)
+        version: Data version from db_service.get_data_version
+        variant: Representation suffix (e.g. 'ndjson') so formats never share a tag
+    """
+    scope = hashlib.sha256(user_email.encode('utf-8')).hexdigest()[:12]
+    tag = f"{scope}-{version}"
+    if variant:
+        tag = f"{tag}-{variant}"
+    return f'"{tag}"'
+
+def etag_matches(request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches etag (weak comparison)."""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def cache_headers(etag: str) -> dict:
+    """Validator headers sent with every response of a conditional endpoint."""
+    return {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept"
+    }
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a client whose copy is still current."""
+    return Response(status_code=304, headers=cache_headers(etag))
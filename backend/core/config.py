@@ -22,6 +22,44 @@ class Config:
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
     
+    # Verified-token cache ("memory" per worker, or "sqlite" shared by all workers)
+    TOKEN_CACHE_BACKEND: str = os.getenv("TOKEN_CACHE_BACKEND", "memory")
+    TOKEN_CACHE_PATH: str = os.getenv("TOKEN_CACHE_PATH", "backend/token_cache.db")
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "1000"))
+    TOKEN_CACHE_ACCESS_TTL: int = int(os.getenv("TOKEN_CACHE_ACCESS_TTL", "300"))
+    TOKEN_CACHE_REJECTED_TTL: int = int(os.getenv("TOKEN_CACHE_REJECTED_TTL", "30"))
+    
+    # Outbound HTTP connection pool (token verification)
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "20"))
+    
+    # Memoized phone parsing/country detection (entries per cache)
+    PHONE_CACHE_SIZE: int = int(os.getenv("PHONE_CACHE_SIZE", "50000"))
+    
+    # Rows per fetchmany when streaming contacts from SQLite
+    DB_FETCH_BATCH_SIZE: int = int(os.getenv("DB_FETCH_BATCH_SIZE", "500"))
+    # Numbers analyzed per batch when streaming a book (keep above the pool threshold)
+    ANALYSIS_BATCH_SIZE: int = int(os.getenv("ANALYSIS_BATCH_SIZE", "10000"))
+    
+    # Phone analysis runs in a process pool for books of at least this many numbers
+    PHONE_ANALYSIS_PARALLEL_THRESHOLD: int = int(os.getenv("PHONE_ANALYSIS_PARALLEL_THRESHOLD", "2000"))
+    PHONE_ANALYSIS_WORKERS: int = int(os.getenv("PHONE_ANALYSIS_WORKERS", "0"))  # 0 = one per core
+    
+    # Per-user People API client pool
+    CLIENT_POOL_MAX_SIZE: int = int(os.getenv("CLIENT_POOL_MAX_SIZE", "100"))
+    CLIENT_POOL_IDLE_SECONDS: int = int(os.getenv("CLIENT_POOL_IDLE_SECONDS", "1800"))
+    
+    # Background sync jobs
+    SYNC_MAX_WORKERS: int = int(os.getenv("SYNC_MAX_WORKERS", "4"))
+    SYNC_MAX_JOBS_PER_USER: int = int(os.getenv("SYNC_MAX_JOBS_PER_USER", "1"))
+    SYNC_JOB_STALE_SECONDS: int = int(os.getenv("SYNC_JOB_STALE_SECONDS", "900"))
+    
+    # Pushing changes to Google
+    PUSH_WORKERS: int = int(os.getenv("PUSH_WORKERS", "4"))
+    PUSH_WRITE_QUOTA_PER_MINUTE: int = int(os.getenv("PUSH_WRITE_QUOTA_PER_MINUTE", "60"))
+    PUSH_MAX_RETRIES: int = int(os.getenv("PUSH_MAX_RETRIES", "5"))
+    PUSH_BACKOFF_BASE_SECONDS: float = float(os.getenv("PUSH_BACKOFF_BASE_SECONDS", "1.0"))
+    PUSH_BACKOFF_MAX_SECONDS: float = float(os.getenv("PUSH_BACKOFF_MAX_SECONDS", "32.0"))
+    
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     IS_PRODUCTION: bool = ENVIRONMENT == "production"
@@ -29,6 +67,14 @@ class Config:
     # Google OAuth (optional - defaults to file-based)
     GOOGLE_CREDENTIALS_JSON: str = os.getenv("GOOGLE_CREDENTIALS_JSON", "")
     
+    # OAuth client IDs an ID token may be issued to (its "aud" claim)
+    GOOGLE_CLIENT_IDS: List[str] = [
+        client_id for client_id in (
+            os.getenv("GOOGLE_WEB_CLIENT_ID", ""),
+            os.getenv("GOOGLE_ANDROID_CLIENT_ID", "")
+        ) if client_id
+    ]
+    
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
@@ -0,0 +1,106 @@
+"""
+Google Signing Certificates
+Keeps Google's OAuth2 signing certificates in memory for as long as the
+HTTP cache headers allow, refreshing them in the background before expiry,
+so ID tokens can be verified locally without a network call per request.
+"""
+import re
+import threading
+import time
+from typing import Dict, Optional
+from backend.core.http_client import get_http_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+
+# Used when Google sends no usable Cache-Control header
+DEFAULT_MAX_AGE_SECONDS = 3600
+# Start a background refresh once less than this much lifetime is left
+REFRESH_AHEAD_SECONDS = 300
+# Unknown key IDs trigger at most one forced refresh per interval
+FORCED_REFRESH_INTERVAL_SECONDS = 60
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertCache:
+    """Thread-safe in-memory cache of Google's PEM signing certificates keyed by key ID."""
+    
+    def __init__(self, url: str = GOOGLE_CERTS_URL):
+        self.url = url
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+    
+    def get_certs(self) -> Dict[str, str]:
+        """
+        Return current certificates.
+        Fetches synchronously only when nothing usable is cached; otherwise a
+        refresh near expiry happens in a background thread.
+        """
+        now = time.monotonic()
+        if not self._certs or now >= self._expires_at:
+            with self._lock:
+                if not self._certs or time.monotonic() >= self._expires_at:
+                    self._fetch()
+        elif self._expires_at - now < REFRESH_AHEAD_SECONDS:
+            self._refresh_in_background()
+        return self._certs
+    
+    def refresh_for_unknown_key(self, key_id: Optional[str]) -> bool:
+        """
+        Force a refresh when a token names a key we do not have (key rotation).
+        
+        Returns:
+            True if the certificates were refetched
+        """
+        with self._lock:
+            if key_id and key_id in self._certs:
+                return True  # Another thread already picked it up
+            if time.monotonic() - self._fetched_at < FORCED_REFRESH_INTERVAL_SECONDS:
+                return False
+            self._fetch()
+            return True
+    
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="google-certs-refresh", daemon=True).start()
+    
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._fetch()
+        except Exception as e:
+            # Keep serving the current certs; the next call retries
+            logger.warning(f"Background refresh of Google certs failed: {e}")
+        finally:
+            self._refreshing = False
+    
+    def _fetch(self):
+        """Fetch certificates and honour Cache-Control max-age minus Age (caller holds the lock)."""
+        response = get_http_session().get(self.url, timeout=10)
+        response.raise_for_status()
+        
+        max_age = DEFAULT_MAX_AGE_SECONDS
+        match = _MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+        if match:
+            max_age = int(match.group(1))
+        age = response.headers.get("Age", "0")
+        if age.isdigit():
+            max_age = max(0, max_age - int(age))
+        
+        self._certs = response.json()
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+        logger.debug(f"Fetched {len(self._certs)} Google signing certs, valid for {max_age}s")
+
+
+# Process-wide instance
+google_cert_cache = GoogleCertCache()
@@ -0,0 +1,46 @@
+"""
+Shared HTTP Client
+One keep-alive requests.Session with a connection pool, reused for every call
+to Google's auth endpoints instead of opening a new TCP/TLS connection each time.
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from backend.core.config import config
+
+GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=config.HTTP_POOL_SIZE,
+                    pool_maxsize=config.HTTP_POOL_SIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def fetch_google_userinfo(access_token: str, timeout: float = 10) -> requests.Response:
+    """
+    Call Google's userinfo endpoint with an access token over the pooled session.
+    
+    Args:
+        access_token: Google OAuth access token
+        timeout: Request timeout in seconds
+        
+    Returns:
+        The raw response (caller checks status_code)
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    return get_http_session().get(GOOGLE_USERINFO_URL, headers=headers, timeout=timeout)
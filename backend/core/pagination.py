@@ -0,0 +1,64 @@
+"""
+Pagination
+Opaque keyset cursors and NDJSON streaming for the list endpoints.
+"""
+import base64
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(key) -> str:
+    """Opaque cursor for the sort key of the last item on a page."""
+    raw = json.dumps(key, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    """
+    Sort key encoded by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def wants_ndjson(request) -> bool:
+    """Whether the client asked for a streamed NDJSON response."""
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+def iter_pages(fetch_page, key, after=None, page_size: int = DEFAULT_PAGE_SIZE):
+    """
+    Walk a keyset-paginated listing to the end, one page at a time.
+    
+    Each page is fetched completely before its items are yielded, so no
+    database cursor stays open between iterations (StreamingResponse may
+    resume the generator on a different threadpool thread).
+    
+    Args:
+        fetch_page: Callable (after, limit) -> list of items
+        key: Callable item -> sort key of that item
+        after: Sort key to start after (None for the beginning)
+        page_size: Items fetched per page
+    """
+    while True:
+        page = fetch_page(after, page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = key(page[-1])
+
+def ndjson_response(items) -> StreamingResponse:
+    """Stream items as newline-delimited JSON, one object per line."""
+    def lines():
+        for item in items:
+            yield json.dumps(jsonable_encoder(item)) + '\n'
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -2,13 +2,20 @@
 Security Utilities
 Handles JWT verification, Google ID token validation, and field-level encryption.
 """
-from typing import Optional, Dict, Any
+import base64
+import hashlib
+import json
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
 from jose import jwt, JWTError
-from google.auth.transport import requests
-from google.oauth2 import id_token
+from google.auth import jwt as google_jwt
 from cryptography.fernet import Fernet
-from cachetools import TTLCache
+from starlette.concurrency import run_in_threadpool
 from backend.core.config import config
+from backend.core.google_certs import google_cert_cache
+from backend.core.http_client import fetch_google_userinfo
+from backend.core.token_cache import create_token_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,9 +27,62 @@ except Exception as e:
     logger.error(f"Failed to initialize encryption: {e}")
     raise ValueError("Invalid ENCRYPTION_KEY in configuration")
 
-# PERF: Token cache to avoid HTTP calls to Google on every request
-# Caches verified tokens for 5 minutes (300 seconds)
-_token_cache: TTLCache = TTLCache(maxsize=100, ttl=300)
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+ID_TOKEN_CLOCK_SKEW_SECONDS = 10
+
+TOKEN_TYPE_ID = "id_token"
+TOKEN_TYPE_ACCESS = "access_token"
+
+# PERF: Unified verified-token cache in front of both verification paths.
+# ID tokens stay until their exp claim, access tokens for TOKEN_CACHE_ACCESS_TTL,
+# rejected tokens for TOKEN_CACHE_REJECTED_TTL. Keys are SHA-256 hashes of the
+# token, never the raw bearer string. TOKEN_CACHE_BACKEND=sqlite shares it
+# across uvicorn workers.
+_token_cache = create_token_cache()
+
+# Single-flight: concurrent verifications of the same token share one call to Google
+_in_flight: Dict[str, "_InFlightVerification"] = {}
+_in_flight_lock = threading.Lock()
+IN_FLIGHT_WAIT_SECONDS = 15
+
+
+class UnknownSigningKey(Exception):
+    """
+    An ID token names a key ID missing from Google's certs, and they were
+    refetched too recently to try again. Transient (Google may just have
+    rotated keys), so the token is rejected for now but never cached as invalid.
+    """
+
+
+class _InFlightVerification:
+    """A verification in progress that other threads can wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+def _token_key(token: str) -> str:
+    """Cache key for a token: its SHA-256 hex digest."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def classify_token(token: str) -> str:
+    """
+    Tell JWT-shaped ID tokens (mobile) from opaque access tokens (web, "ya29...")
+    without any crypto or network call.
+    
+    Returns:
+        TOKEN_TYPE_ID or TOKEN_TYPE_ACCESS
+    """
+    parts = token.split('.')
+    if len(parts) != 3 or not all(parts):
+        return TOKEN_TYPE_ACCESS
+    try:
+        header = json.loads(base64.urlsafe_b64decode(parts[0] + '=' * (-len(parts[0]) % 4)))
+    except (ValueError, TypeError):
+        return TOKEN_TYPE_ACCESS
+    return TOKEN_TYPE_ID if isinstance(header, dict) and 'alg' in header else TOKEN_TYPE_ACCESS
 
 
 class GoogleTokenVerifier:
@@ -34,90 +94,186 @@ class GoogleTokenVerifier:
         Verify Google token and return user information.
         Handles both ID tokens (mobile) and access tokens (web).
         
+        The token type is classified up front so each token goes straight to
+        its verifier. Verified and recently rejected tokens are served from
+        cache, and concurrent calls for the same token share one verification.
+        
         Args:
             token: Google ID token or access token from client
             
         Returns:
             Dict with user info (email, name, sub) or None if invalid
         """
-        # First, try as ID token (mobile clients)
-        result = GoogleTokenVerifier._verify_id_token(token)
-        if result:
-            return result
+        key = _token_key(token)
+        hit, user = GoogleTokenVerifier._get_cached(key)
+        if hit:
+            return user
         
-        # If ID token verification failed, try as access token (web clients)
-        result = GoogleTokenVerifier._verify_access_token(token)
-        if result:
-            return result
+        with _in_flight_lock:
+            flight = _in_flight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _InFlightVerification()
+                _in_flight[key] = flight
         
-        return None
+        if not is_leader:
+            logger.debug("Waiting on in-flight verification of the same token")
+            flight.done.wait(IN_FLIGHT_WAIT_SECONDS)
+            return flight.result
+        
+        try:
+            flight.result = GoogleTokenVerifier._verify_uncached(token, key)
+        finally:
+            with _in_flight_lock:
+                _in_flight.pop(key, None)
+            flight.done.set()
+        return flight.result
+    
+    @staticmethod
+    async def verify_token_async(token: str) -> Optional[Dict[str, Any]]:
+        """
+        Async variant of verify_token for use inside middleware.
+        Tokens in the in-memory cache are answered on the event loop; anything
+        that needs I/O (a network call, or the shared SQLite cache) runs in
+        the threadpool so the loop is never blocked.
+        """
+        if not _token_cache.blocking_reads:
+            hit, user = GoogleTokenVerifier._get_cached(_token_key(token))
+            if hit:
+                return user
+        return await run_in_threadpool(GoogleTokenVerifier.verify_token, token)
+    
+    @staticmethod
+    def _get_cached(key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Returns:
+            (True, user) for a cached valid token, (True, None) for a recently
+            rejected one, (False, None) on a miss
+        """
+        return _token_cache.get(key)
     
     @staticmethod
-    def _verify_id_token(token: str) -> Optional[Dict[str, Any]]:
-        """Verify Google ID token (mobile clients)."""
+    def cache_stats() -> Dict[str, Any]:
+        """Hit-rate counters of the verified-token cache (this process)."""
+        return _token_cache.stats()
+    
+    @staticmethod
+    def _verify_uncached(token: str, key: str) -> Optional[Dict[str, Any]]:
+        """Verify with the right verifier and record the outcome in the caches."""
         try:
-            # Verify the token with Google's servers
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request()
-            )
+            if classify_token(token) == TOKEN_TYPE_ID:
+                verified = GoogleTokenVerifier._verify_id_token(token)
+            else:
+                verified = GoogleTokenVerifier._verify_access_token(token)
+        except Exception as e:
+            # Network trouble or Google errors are transient: do not cache
+            logger.debug(f"Token verification error: {e}")
+            return None
+        
+        if not verified:
+            _token_cache.put_rejected(key)
+            return None
+        
+        user, expires_at = verified
+        # PERF: Cache the verified token until it expires
+        _token_cache.put(key, user, expires_at)
+        logger.debug(f"Token cached for user: {user.get('email')}")
+        return user
+    
+    @staticmethod
+    def _decode_id_token(token: str) -> Dict[str, Any]:
+        """
+        Verify an ID token's signature and claims, including that it was issued
+        to one of our OAuth clients, locally against Google's cached signing certs.
+        
+        Raises:
+            ValueError: If the token is invalid
+            UnknownSigningKey: If its key ID is unknown and the certs cannot be refetched yet
+        """
+        if not config.GOOGLE_CLIENT_IDS:
+            raise ValueError("No GOOGLE_WEB_CLIENT_ID/GOOGLE_ANDROID_CLIENT_ID configured to check the audience against")
+        
+        certs = google_cert_cache.get_certs()
+        key_id = google_jwt.decode_header(token).get('kid')
+        if key_id and key_id not in certs:
+            # Google may have rotated keys since our copy was fetched
+            if not google_cert_cache.refresh_for_unknown_key(key_id):
+                raise UnknownSigningKey(f"Unknown signing key {key_id}")
+            certs = google_cert_cache.get_certs()
+            if key_id not in certs:
+                raise UnknownSigningKey(f"Unknown signing key {key_id}")
+        
+        idinfo = google_jwt.decode(
+            token,
+            certs=certs,
+            audience=config.GOOGLE_CLIENT_IDS,
+            clock_skew_in_seconds=ID_TOKEN_CLOCK_SKEW_SECONDS
+        )
+        
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+        return idinfo
+    
+    @staticmethod
+    def _verify_id_token(token: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Verify Google ID token (mobile clients) locally.
+        
+        Returns:
+            (user info, expiry as epoch seconds) or None if invalid
+            
+        Raises:
+            Exception: If Google's certs could not be fetched or the signing
+                key is not known yet (transient)
+        """
+        try:
+            idinfo = GoogleTokenVerifier._decode_id_token(token)
             
             # Token is valid, extract user info
-            return {
+            user = {
                 'email': idinfo.get('email'),
                 'name': idinfo.get('name'),
                 'sub': idinfo.get('sub'),  # Google user ID
                 'picture': idinfo.get('picture'),
                 'email_verified': idinfo.get('email_verified', False)
             }
+            return user, float(idinfo['exp'])
         except ValueError as e:
             # Not a valid ID token
             logger.debug(f"Not a valid ID token: {e}")
             return None
-        except Exception as e:
-            logger.debug(f"ID token verification error: {e}")
-            return None
     
     @staticmethod
-    def _verify_access_token(token: str) -> Optional[Dict[str, Any]]:
-        """Verify Google access token (web clients) using userinfo endpoint with caching."""
-        # PERF: Check cache first to avoid HTTP call
-        if token in _token_cache:
-            logger.debug("Access token found in cache")
-            return _token_cache[token]
+    def _verify_access_token(token: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Verify Google access token (web clients) using the userinfo endpoint.
         
-        try:
-            import requests as http_requests
-            
-            # Verify access token by calling Google's userinfo endpoint
-            userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-            headers = {"Authorization": f"Bearer {token}"}
-            
-            response = http_requests.get(userinfo_url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                logger.debug(f"Access token verification failed: {response.status_code}")
-                return None
-            
-            user_info = response.json()
-            
-            # Extract user details
-            result = {
-                'email': user_info.get('email'),
-                'name': user_info.get('name'),
-                'sub': user_info.get('sub'),
-                'picture': user_info.get('picture'),
-                'email_verified': user_info.get('email_verified', False)
-            }
-            
-            # PERF: Cache the verified token
-            _token_cache[token] = result
-            logger.debug(f"Access token cached for user: {result.get('email')}")
+        Returns:
+            (user info, cache expiry as epoch seconds) or None if invalid
             
-            return result
-        except Exception as e:
-            logger.debug(f"Access token verification error: {e}")
+        Raises:
+            Exception: On network errors or unexpected Google responses (transient)
+        """
+        # Verify access token by calling Google's userinfo endpoint (keep-alive pool)
+        response = fetch_google_userinfo(token)
+        
+        if response.status_code in (400, 401, 403):
+            logger.debug(f"Access token verification failed: {response.status_code}")
             return None
+        if response.status_code != 200:
+            raise RuntimeError(f"Google userinfo returned {response.status_code}")
+        
+        user_info = response.json()
+        
+        # Extract user details
+        user = {
+            'email': user_info.get('email'),
+            'name': user_info.get('name'),
+            'sub': user_info.get('sub'),
+            'picture': user_info.get('picture'),
+            'email_verified': user_info.get('email_verified', False)
+        }
+        return user, time.time() + config.TOKEN_CACHE_ACCESS_TTL
 
 
 class FieldEncryption:
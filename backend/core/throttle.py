@@ -0,0 +1,86 @@
+"""
+Google API Throttling
+Token-bucket pacing and exponential backoff with jitter for People API calls.
+"""
+import random
+import threading
+import time
+from typing import Optional
+from googleapiclient.errors import HttpError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Quota exhausted / backend overloaded: safe to retry, nothing was applied
+RETRYABLE_STATUS_CODES = {429, 503}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: Sustained number of tokens refilled per minute
+            capacity: Maximum burst size (defaults to one second's worth, at least 1)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        """Take tokens from the bucket, sleeping until enough have been refilled."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max_delay, base * 2^attempt))."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def execute_with_backoff(request, bucket: Optional[TokenBucket] = None, max_retries: int = 5,
+                         base_delay: float = 1.0, max_delay: float = 32.0):
+    """
+    Execute a googleapiclient request, retrying 429/503 with exponential backoff and jitter.
+    
+    Args:
+        request: googleapiclient HttpRequest (anything with execute())
+        bucket: Optional TokenBucket every attempt must take a token from
+        max_retries: Retries after the first attempt before giving up
+        base_delay: Backoff base in seconds
+        max_delay: Backoff cap in seconds (also caps Retry-After)
+        
+    Returns:
+        The request's response
+        
+    Raises:
+        HttpError: Non-retryable errors, or the last error once retries are exhausted
+    """
+    attempt = 0
+    while True:
+        if bucket:
+            bucket.acquire()
+        try:
+            return request.execute()
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUS_CODES or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            # Honour Retry-After when Google sends one, within the backoff cap
+            retry_after = e.resp.get('retry-after')
+            if retry_after and retry_after.isdigit():
+                delay = min(max_delay, max(delay, float(retry_after)))
+            logger.warning(f"Google API returned {e.resp.status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,193 @@
+"""
+Verified-Token Cache Backends
+Pluggable cache of verified (and recently rejected) Google tokens.
+
+- "memory": per-process TLRU cache (default, single worker)
+- "sqlite": a SQLite file shared by every uvicorn worker on the host
+
+Keys are SHA-256 digests of tokens; entries expire with the token itself.
+"""
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, Tuple
+from cachetools import TLRUCache
+from backend.core.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _until_expiry(key, value, now):
+    """TLRUCache time-to-use: keep an entry until its own expires_at (epoch seconds)."""
+    return now + (value['expires_at'] - time.time())
+
+
+class TokenCache(ABC):
+    """Base class: hit/miss counters shared by all backends."""
+    
+    # Whether a lookup may block on I/O (then it must not run on the event loop)
+    blocking_reads = False
+    
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+    
+    def get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Returns:
+            (True, user) for a cached valid token, (True, None) for a recently
+            rejected one, (False, None) on a miss
+        """
+        entry = self._get(key)
+        with self._stats_lock:
+            if entry is None:
+                self._misses += 1
+                return False, None
+            if entry['user'] is None:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+        return True, entry['user']
+    
+    def put(self, key: str, user: Dict[str, Any], expires_at: float):
+        """Cache a verified token's user info until expires_at (epoch seconds)."""
+        self._put(key, user, expires_at)
+    
+    def put_rejected(self, key: str):
+        """Remember a rejected token for TOKEN_CACHE_REJECTED_TTL seconds."""
+        self._put(key, None, time.time() + config.TOKEN_CACHE_REJECTED_TTL)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters for this process."""
+        with self._stats_lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "backend": self.backend,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._negative_hits) / lookups, 4) if lookups else 0.0
+            }
+    
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Unexpired entry {'user', 'expires_at'} for key, or None."""
+    
+    @abstractmethod
+    def _put(self, key: str, user: Optional[Dict[str, Any]], expires_at: float):
+        """Store an entry (user None marks a rejected token)."""
+
+
+class MemoryTokenCache(TokenCache):
+    """In-process cache; each uvicorn worker has its own."""
+    
+    backend = "memory"
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=_until_expiry)
+        # TLRUCache is not thread-safe; verification also runs in the threadpool
+        self._lock = threading.Lock()
+    
+    def _get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+    
+    def _put(self, key, user, expires_at):
+        with self._lock:
+            self._cache[key] = {'user': user, 'expires_at': expires_at}
+
+
+class SQLiteTokenCache(TokenCache):
+    """Cache in a SQLite file shared by all worker processes on one host."""
+    
+    backend = "sqlite"
+    blocking_reads = True
+    
+    # Expired rows are purged and the size bound enforced every N writes
+    PURGE_EVERY_WRITES = 100
+    
+    def __init__(self, path: str, maxsize: int):
+        super().__init__()
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._writes = 0
+        
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_cache (
+                token_hash TEXT PRIMARY KEY,
+                user_json TEXT,
+                expires_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_token_cache_expiry ON token_cache(expires_at)')
+        conn.commit()
+    
+    def _connection(self):
+        """Thread-local connection, like db_service."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+    
+    def _get(self, key):
+        try:
+            row = self._connection().execute(
+                'SELECT user_json, expires_at FROM token_cache WHERE token_hash = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            # A busy cache must never fail authentication: treat it as a miss
+            logger.warning(f"Token cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return {'user': json.loads(row[0]) if row[0] else None, 'expires_at': row[1]}
+    
+    def _put(self, key, user, expires_at):
+        conn = self._connection()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO token_cache (token_hash, user_json, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(user) if user is not None else None, expires_at)
+            )
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            # A busy cache must never fail authentication
+            logger.warning(f"Token cache write failed: {e}")
+            return
+        
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY_WRITES == 0:
+            self._purge(conn)
+    
+    def _purge(self, conn):
+        """Drop expired rows, then the soonest-expiring rows beyond maxsize."""
+        try:
+            conn.execute('DELETE FROM token_cache WHERE expires_at <= ?', (time.time(),))
+            conn.execute('''
+                DELETE FROM token_cache WHERE token_hash IN (
+                    SELECT token_hash FROM token_cache
+                    ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.maxsize,))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Token cache purge failed: {e}")
+
+
+def create_token_cache() -> TokenCache:
+    """Build the backend selected by TOKEN_CACHE_BACKEND."""
+    if config.TOKEN_CACHE_BACKEND == "sqlite":
+        logger.info(f"Using shared SQLite token cache at {config.TOKEN_CACHE_PATH}")
+        return SQLiteTokenCache(config.TOKEN_CACHE_PATH, config.TOKEN_CACHE_MAX_SIZE)
+    return MemoryTokenCache(config.TOKEN_CACHE_MAX_SIZE)
@@ -4,8 +4,10 @@ from slowapi.errors import RateLimitExceeded
 from backend.routers import auth, contacts, token_exchange
 from backend.core.config import config
 from backend.core.logging_config import setup_logging
+from backend.core.security import GoogleTokenVerifier
 from backend.middleware.auth_middleware import AuthenticationMiddleware
 from backend.middleware.rate_limit import limiter, rate_limit_handler
+from backend.services import phone_service
 import logging
 
 # Setup logging
@@ -28,7 +30,8 @@ app.add_middleware(
     allow_origins=config.CORS_ORIGINS,  # Restrict to specific origins
     allow_credentials=True,
     allow_methods=["GET", "POST", "DELETE"],  # Only allowed methods
-    allow_headers=["Authorization", "Content-Type"],  # Only needed headers
+    allow_headers=["Authorization", "Content-Type", "If-None-Match"],  # Only needed headers
+    expose_headers=["ETag"],  # Lets browser clients revalidate with If-None-Match
     max_age=3600,  # Cache preflight for 1 hour
 )
 
@@ -84,7 +87,9 @@ async def health_check():
             "authentication": "enabled",
             "rate_limiting": "enabled",
             "encryption": "enabled"
-        }
+        },
+        "token_cache": GoogleTokenVerifier.cache_stats(),
+        "phone_cache": phone_service.cache_stats()
     }
 
 
@@ -98,5 +103,12 @@ async def startup_event():
     logger.info(f"CORS Origins: {', '.join(config.CORS_ORIGINS)}")
     logger.info(f"Rate Limit: {config.RATE_LIMIT_PER_MINUTE}/minute")
     logger.info("Security Features: Authentication, Rate Limiting, Encryption")
+    if not config.GOOGLE_CLIENT_IDS:
+        logger.warning("GOOGLE_WEB_CLIENT_ID/GOOGLE_ANDROID_CLIENT_ID not set: ID tokens will be rejected")
     logger.info("=" * 60)
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop worker processes started for phone analysis."""
+    phone_service.shutdown_analysis_pool()
@@ -65,8 +65,8 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                 }
             )
         
-        # Verify Google ID token
-        user_info = GoogleTokenVerifier.verify_token(token)
+        # Verify Google ID token (network calls run off the event loop)
+        user_info = await GoogleTokenVerifier.verify_token_async(token)
         
         if not user_info:
             security_logger.log_auth_failure("Invalid or expired token", request.url.path)
@@ -1,5 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from backend.services.auth_service import get_authenticated_service
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Optional
+from backend.services.auth_service import get_authenticated_service, authorize_user_with_code
+from backend.services import sync_jobs
+from backend.middleware.auth_middleware import get_current_user_email
+from backend.middleware.rate_limit import limiter
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/auth",
@@ -20,10 +29,43 @@ async def login_redirect():
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
 
+class AuthorizeRequest(BaseModel):
+    code: str = Field(..., min_length=1, max_length=2048)
+    redirect_uri: Optional[str] = Field(None, max_length=500)
+
+
+@router.post("/authorize")
+@limiter.limit("10/minute")
+async def authorize(request: Request, authorize_request: AuthorizeRequest):
+    """
+    Store the authenticated user's own Google credentials.
+    Exchanges a server auth code (offline access, contacts scope) so sync and
+    push use the user's address book instead of the shared token.json, then
+    queues a full resync to replace contacts synced from the shared account.
+    """
+    user_email = get_current_user_email(request)
+    try:
+        # The code exchange is a blocking HTTP call to Google; keep it off the event loop
+        await run_in_threadpool(
+            authorize_user_with_code, user_email, authorize_request.code, authorize_request.redirect_uri
+        )
+    except Exception as e:
+        logger.error(f"Failed to authorize Google access for {user_email}: {e}")
+        raise HTTPException(status_code=400, detail="Failed to exchange authorization code")
+    
+    try:
+        sync_job = await run_in_threadpool(sync_jobs.submit_sync_job, user_email, True)
+    except sync_jobs.SyncJobLimitExceeded as e:
+        # The sync token is cleared, so the next sync the user starts is full anyway
+        logger.warning(f"Full resync after authorize not queued for {user_email}: {e}")
+        sync_job = None
+    return {"status": "authorized", "email": user_email, "sync_job": sync_job}
+
 @router.get("/status")
-async def get_auth_status():
+async def get_auth_status(request: Request):
     try:
-        service = get_authenticated_service()
+        user_email = getattr(request.state, 'user_email', None)
+        service = get_authenticated_service(user_email)
         # Try to get the user's profile to prove we are logged in
         profile = service.people().get(resourceName='people/me', personFields='names,emailAddresses').execute()
         
@@ -45,5 +87,5 @@ async def get_auth_status():
         return {
             "status": "unauthenticated", 
             "detail": str(e),
-            "instruction": "Please run 'python backend/services/auth_service.py' locally to login."
+            "instruction": "Please run 'python -m backend.services.auth_service' locally to login."
         }
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Request, HTTPException, status
+from fastapi import APIRouter, Request, Response, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, validator
 from typing import Optional
-from backend.services import contact_service, db_service
+from backend.services import contact_service, db_service, push_service, sync_jobs
 from backend.middleware.auth_middleware import get_current_user_email
 from backend.middleware.rate_limit import limiter
+from backend.core.config import config
 from backend.core.logging_config import security_logger
+from backend.core.conditional import cache_headers, etag_matches, make_etag, not_modified
+from backend.core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor,
+    iter_pages, ndjson_response, wants_ndjson
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,37 +38,174 @@ class StageFixRequest(BaseModel):
             raise ValueError('Action must be accept, reject, or edit')
         return v
 
+# ============= PAGINATION HELPERS =============
+
+def _parse_cursor(cursor: Optional[str], is_valid_key):
+    """Decode a keyset cursor, or raise 400 if it is malformed."""
+    if cursor is None:
+        return None
+    try:
+        key = decode_cursor(cursor)
+    except ValueError:
+        key = None
+    if key is None or not is_valid_key(key):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return key
+
+def _page_size(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """Page size of a paginated request, or None for the full (legacy) listing."""
+    if limit is None and cursor is None:
+        return None
+    return limit or DEFAULT_PAGE_SIZE
+
+def _next_cursor(page, page_size: int, key) -> Optional[str]:
+    """Cursor for the page after this one (None once the listing is exhausted)."""
+    if len(page) < page_size:
+        return None
+    return encode_cursor(key(page[-1]))
+
+def _is_resource_key(key) -> bool:
+    return isinstance(key, str)
+
+def _resource_key(item):
+    return item['resource_name']
+
+def _is_staged_key(key) -> bool:
+    return (isinstance(key, list) and len(key) == 2
+            and isinstance(key[0], str) and isinstance(key[1], int))
+
+def _staged_key(change):
+    return [change['created_at'], change['id']]
+
+# ============= CONDITIONAL GET HELPERS =============
+
+def _current_etag(request: Request, user_email: str) -> str:
+    """
+    ETag of the user's data as it is now.
+    
+    Read BEFORE the content: a write landing in between then only makes
+    the tag older than the body, so the next request refetches.
+    """
+    variant = 'ndjson' if wants_ndjson(request) else None
+    return make_etag(user_email, db_service.get_data_version(user_email), variant)
+
+def _streamed(items, etag: str):
+    """NDJSON response carrying the validator headers."""
+    streaming = ndjson_response(items)
+    streaming.headers.update(cache_headers(etag))
+    return streaming
+
 # ============= ENDPOINTS WITH AUTHENTICATION =============
 
 @router.get("/")
 @limiter.limit("30/minute")
-async def list_contacts(request: Request):
-    """Get all contacts for the authenticated user."""
+async def list_contacts(
+    request: Request,
+    response: Response,
+    fields: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Get all contacts for the authenticated user, ordered by resource_name.
+    fields: comma-separated columns to return (default: everything but raw_json).
+    limit/cursor: keyset pagination; Accept: application/x-ndjson streams instead.
+    If-None-Match: answered with 304 while the user's data is unchanged.
+    """
     user_email = get_current_user_email(request)
     logger.info(f"Listing contacts for user: {user_email}")
-    return db_service.get_all_contacts(user_email)
+    
+    projection = db_service.CONTACT_LIST_FIELDS
+    if fields:
+        projection = tuple(field.strip() for field in fields.split(',') if field.strip())
+    unknown = [field for field in projection if field not in db_service.CONTACT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown contact fields: {', '.join(unknown)}. Allowed: {', '.join(db_service.CONTACT_FIELDS)}"
+        )
+    
+    after = _parse_cursor(cursor, _is_resource_key)
+    page_size = _page_size(limit, cursor)
+    
+    # PERF: Unchanged data costs one primary-key lookup instead of a listing
+    etag = _current_etag(request, user_email)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    def fetch_page(after, size):
+        return db_service.get_all_contacts(user_email, fields=projection, after=after, limit=size)
+    
+    if wants_ndjson(request):
+        return _streamed(iter_pages(fetch_page, _resource_key, after, config.DB_FETCH_BATCH_SIZE), etag)
+    response.headers.update(cache_headers(etag))
+    if page_size is None:
+        return await run_in_threadpool(db_service.get_all_contacts, user_email, projection)
+    
+    page = await run_in_threadpool(fetch_page, after, page_size)
+    return {
+        "contacts": page,
+        "next_cursor": _next_cursor(page, page_size, _resource_key)
+    }
 
-@router.post("/sync")
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
 @limiter.limit("5/minute")  # Stricter limit for expensive operation
-async def sync_contacts(request: Request):
-    """Trigger a fetch from Google for the authenticated user."""
+async def sync_contacts(request: Request, full: bool = False):
+    """
+    Queue a fetch from Google for the authenticated user.
+    Incremental by default; pass full=true to force a full resync.
+    Returns a job immediately; poll GET /contacts/sync/{job_id} for progress.
+    """
     user_email = get_current_user_email(request)
-    logger.info(f"Syncing contacts from Google for user: {user_email}")
+    logger.info(f"Queueing contact sync from Google for user: {user_email}")
     try:
-        result = contact_service.sync_contacts_from_google(user_email)
-        logger.info(f"Successfully synced {result['synced_count']} contacts for {user_email}")
-        return result
+        # Queueing writes the job row to SQLite; keep lock waits off the event loop
+        return await run_in_threadpool(sync_jobs.submit_sync_job, user_email, full_resync=full)
+    except sync_jobs.SyncJobLimitExceeded as e:
+        logger.warning(f"Sync rejected for {user_email}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="A sync is already in progress"
+        )
     except Exception as e:
-        logger.error(f"Failed to sync contacts for {user_email}: {e}")
+        logger.error(f"Failed to queue sync for {user_email}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to sync contacts from Google"
         )
 
+@router.get("/sync/{job_id}")
+@limiter.limit("60/minute")
+async def get_sync_status(request: Request, job_id: str):
+    """Get progress of a sync job (pages fetched, rows written, errors)."""
+    user_email = get_current_user_email(request)
+    
+    # Polled every few seconds while sync workers hold write locks: never block the loop
+    job = await run_in_threadpool(sync_jobs.get_sync_job, job_id, user_email)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sync job not found"
+        )
+    return job
+
 @router.get("/missing_extension")
 @limiter.limit("20/minute")
-async def get_missing_extension_contacts(request: Request, region: str = "US"):
-    """Returns contacts that need phone number standardization."""
+async def get_missing_extension_contacts(
+    request: Request,
+    response: Response,
+    region: str = "US",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Returns contacts that need phone number standardization, ordered by resource_name.
+    limit/cursor: keyset pagination; Accept: application/x-ndjson streams instead.
+    If-None-Match: answered with 304 while the user's data is unchanged.
+    """
     user_email = get_current_user_email(request)
    
     # Validate region format (2-letter ISO code)
@@ -74,17 +218,33 @@ async def get_missing_extension_contacts(request: Request, region: str = "US"):
     region = region.upper()
     logger.info(f"Getting contacts needing fixes for user: {user_email}, region: {region}")
     
+    after = _parse_cursor(cursor, _is_resource_key)
+    page_size = _page_size(limit, cursor)
+    
+    etag = _current_etag(request, user_email)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # PERF: Staged contacts are excluded in the same query (NOT EXISTS on staged_changes)
+    def fetch_page(after, size):
+        return contact_service.get_contacts_missing_extension(
+            user_email, default_region=region, exclude_staged=True, after=after, limit=size
+        )
+    
+    if wants_ndjson(request):
+        return _streamed(iter_pages(fetch_page, _resource_key, after, config.DB_FETCH_BATCH_SIZE), etag)
+    
     try:
-        contacts = contact_service.get_contacts_missing_extension(user_email, default_region=region)
+        unstaged = await run_in_threadpool(fetch_page, after, page_size)
         
-        # PERF: Single query to get all staged resource names (O(1) lookup instead of N queries)
-        staged_names = db_service.get_all_staged_resource_names(user_email)
-        unstaged = [c for c in contacts if c['resource_name'] not in staged_names]
-        
-        return {
+        result = {
             "count": len(unstaged),
             "contacts": unstaged
         }
+        if page_size is not None:
+            result["next_cursor"] = _next_cursor(unstaged, page_size, _resource_key)
+        response.headers.update(cache_headers(etag))
+        return result
     except Exception as e:
         logger.error(f"Failed to get missing extension contacts: {e}")
         raise HTTPException(
@@ -94,20 +254,24 @@ async def get_missing_extension_contacts(request: Request, region: str = "US"):
 
 @router.get("/analyze_regions")
 @limiter.limit("10/minute")
-async def analyze_regions(request: Request):
-    """Analyzes contacts across multiple regions and returns counts."""
+async def analyze_regions(request: Request, response: Response):
+    """
+    Analyzes contacts across multiple regions and returns counts.
+    If-None-Match: answered with 304 while the user's data is unchanged.
+    """
     user_email = get_current_user_email(request)
     logger.info(f"Analyzing regions for user: {user_email}")
     
+    etag = _current_etag(request, user_email)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     regions_to_test = ["IN", "US", "GB", "AU", "CA", "DE", "AE", "SG"]
     
-    results = []
-    for region in regions_to_test:
-        contacts = contact_service.get_contacts_missing_extension(user_email, default_region=region)
-        if len(contacts) > 0:
-            results.append({"region": region, "count": len(contacts)})
+    results = await run_in_threadpool(contact_service.analyze_regions, user_email, regions_to_test)
     
     results.sort(key=lambda x: x["count"], reverse=True)
+    response.headers.update(cache_headers(etag))
     return {"regions": results[:5]}
 
 # ============= STAGING ENDPOINTS =============
@@ -149,17 +313,43 @@ async def stage_fix(request: Request, fix_request: StageFixRequest):
 
 @router.get("/pending_changes")
 @limiter.limit("20/minute")
-async def get_pending_changes(request: Request):
-    """Get all staged changes and summary for the authenticated user."""
+async def get_pending_changes(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Get all staged changes (newest first) and summary for the authenticated user.
+    limit/cursor: keyset pagination; Accept: application/x-ndjson streams the changes instead.
+    If-None-Match: answered with 304 while the user's data is unchanged.
+    """
     user_email = get_current_user_email(request)
     logger.info(f"Getting pending changes for user: {user_email}")
     
-    changes = db_service.get_staged_changes(user_email)
-    summary = db_service.get_staged_changes_summary(user_email)
-    return {
+    after = _parse_cursor(cursor, _is_staged_key)
+    page_size = _page_size(limit, cursor)
+    
+    etag = _current_etag(request, user_email)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    def fetch_page(after, size):
+        return list(db_service.iter_staged_changes(user_email, after=after, limit=size))
+    
+    if wants_ndjson(request):
+        return _streamed(iter_pages(fetch_page, _staged_key, after, config.DB_FETCH_BATCH_SIZE), etag)
+    
+    changes = await run_in_threadpool(fetch_page, after, page_size)
+    summary = await run_in_threadpool(db_service.get_staged_changes_summary, user_email)
+    result = {
         "summary": summary,
         "changes": changes
     }
+    if page_size is not None:
+        result["next_cursor"] = _next_cursor(changes, page_size, _staged_key)
+    response.headers.update(cache_headers(etag))
+    return result
 
 @router.delete("/staged/remove")
 @limiter.limit("30/minute")
@@ -210,47 +400,43 @@ async def push_to_google(request: Request):
             "message": "No staged changes to push"
         }
     
+    # Live throughput for GET /contacts/push_progress while this request runs
+    await run_in_threadpool(db_service.start_push_progress, user_email)
+    
+    def on_progress(stats):
+        db_service.update_push_progress(user_email, stats)
+    
+    try:
+        # Pushing waits on Google (and on backoff sleeps); keep it off the event loop
+        pushed = await run_in_threadpool(
+            push_service.push_staged_changes, user_email, changes, progress_callback=on_progress
+        )
+    except Exception as e:
+        logger.error(f"Failed to push changes for {user_email}: {e}")
+        await run_in_threadpool(db_service.update_push_progress, user_email, status='failed')
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to push changes to Google"
+        )
+    
     results = {
-        "success": [],
-        "failed": [],
-        "skipped": []
+        "success": [change['contact_name'] for change in pushed['success']],
+        "failed": [
+            {"name": failure['change']['contact_name'], "error": failure['error']}
+            for failure in pushed['failed']
+        ],
+        "skipped": [change['contact_name'] for change in pushed['skipped']]
     }
+    for failure in results['failed']:
+        logger.error(f"Failed to push change for {failure['name']}: {failure['error']}")
     
-    for change in changes:
-        if change['action'] == 'reject':
-            results['skipped'].append(change['contact_name'])
-            continue
-            
-        # For 'accept' and 'edit', push to Google
-        try:
-            contact = db_service.find_contact_by_resource_name(change['resource_name'], user_email)
-            if not contact:
-                results['failed'].append({
-                    "name": change['contact_name'],
-                    "error": "Contact not found in local DB"
-                })
-                logger.warning(f"Contact not found for push: {change['resource_name']}")
-                continue
-                
-            contact_service.update_contact(
-                resource_name=change['resource_name'],
-                etag=contact['etag'],
-                user_email=user_email,
-                new_phone=change['new_phone'],
-                new_name=change['new_name']
-            )
-            results['success'].append(change['contact_name'])
-            logger.info(f"Successfully pushed change for: {change['contact_name']}")
-        except Exception as e:
-            results['failed'].append({
-                "name": change['contact_name'],
-                "error": str(e)
-            })
-            logger.error(f"Failed to push change for {change['contact_name']}: {e}")
-    
-    # Clear all staged changes after push
-    db_service.clear_all_staged_changes(user_email)
+    # Clear pushed and skipped changes; failed ones stay staged for a retry
+    db_service.remove_staged_changes(
+        [change['resource_name'] for change in pushed['success'] + pushed['skipped']],
+        user_email
+    )
     
+    await run_in_threadpool(db_service.update_push_progress, user_email, pushed['stats'], status='completed')
     logger.info(f"Push completed for {user_email}: {len(results['success'])} success, {len(results['failed'])} failed, {len(results['skipped'])} skipped")
     
     return {
@@ -258,5 +444,25 @@ async def push_to_google(request: Request):
         "pushed": len(results['success']),
         "failed": len(results['failed']),
         "skipped": len(results['skipped']),
+        "throughput": pushed['stats'],
         "details": results
     }
+
+@router.get("/push_progress")
+@limiter.limit("60/minute")
+async def get_push_progress(request: Request):
+    """
+    Live throughput of the user's latest push. Poll while POST /push_to_google
+    is running; counters update after every batch.
+    """
+    user_email = get_current_user_email(request)
+    
+    # Polled while push workers write to SQLite: never block the loop
+    progress = await run_in_threadpool(db_service.get_push_progress, user_email)
+    if not progress:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No push found"
+        )
+    progress.pop('user_email')
+    return progress
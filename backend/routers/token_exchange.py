@@ -5,8 +5,8 @@ This endpoint exchanges the access_token for an ID token.
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from google.auth.transport import requests
-from google.oauth2 import id_token as google_id_token
+from starlette.concurrency import run_in_threadpool
+from backend.core.http_client import fetch_google_userinfo
 import requests as http_requests
 import logging
 
@@ -43,11 +43,9 @@ async def exchange_token(request: TokenExchangeRequest):
     
     try:
         # Verify access token by calling Google's userinfo endpoint
-        userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-        headers = {"Authorization": f"Bearer {request.access_token}"}
-        
+        # (pooled keep-alive session, run off the event loop)
         logger.debug(f"Verifying access_token with Google userinfo endpoint")
-        response = http_requests.get(userinfo_url, headers=headers, timeout=10)
+        response = await run_in_threadpool(fetch_google_userinfo, request.access_token)
         
         if response.status_code != 200:
             logger.warning(f"Token exchange failed: {response.status_code}")
@@ -1,8 +1,22 @@
+import json
 import os.path
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+from google_auth_oauthlib.flow import Flow, InstalledAppFlow
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from backend.core.config import config
+from backend.services import db_service
+import logging
+
+logger = logging.getLogger(__name__)
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/contacts.readonly", "https://www.googleapis.com/auth/contacts"]
@@ -10,10 +24,83 @@ SCOPES = ["https://www.googleapis.com/auth/contacts.readonly", "https://www.goog
 CREDENTIALS_FILE = 'backend/credentials.json'
 TOKEN_FILE = 'backend/token.json'
 
-def get_authenticated_service():
-    """Shows basic usage of the People API.
-    Prints the name of the first 10 connections.
+# Refresh access tokens this long before they expire instead of on a 401
+REFRESH_MARGIN = timedelta(minutes=5)
+HTTP_TIMEOUT_SECONDS = 30
+
+# PERF: People API discovery document bundled with googleapiclient, parsed once per process
+_discovery_doc = None
+_discovery_lock = threading.Lock()
+
+# Token refreshes reuse one transport (and its connection pool)
+_refresh_request = Request()
+
+
+def _get_discovery_doc():
+    """Parsed static People API v1 discovery document (no network fetch)."""
+    global _discovery_doc
+    if _discovery_doc is None:
+        with _discovery_lock:
+            if _discovery_doc is None:
+                _discovery_doc = json.loads(get_static_doc("people", "v1"))
+    return _discovery_doc
+
+
+def _build_people_service(creds):
+    """Build a People API client with its own HTTP transport (httplib2 is not thread-safe)."""
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS))
+    return build_from_document(_get_discovery_doc(), http=http)
+
+
+def _expires_soon(creds) -> bool:
+    return creds.expiry is not None and creds.expiry - datetime.utcnow() < REFRESH_MARGIN
+
+
+class _CachedClient:
+    """
+    In-memory credentials plus one reusable People API service per thread.
+    Credentials are refreshed proactively, under a lock, shortly before they expire.
     """
+    
+    def __init__(self, creds, on_refresh=None):
+        self.creds = creds
+        self._on_refresh = on_refresh
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+    
+    def service(self):
+        """Return this thread's People API service with fresh credentials."""
+        self._ensure_fresh()
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = _build_people_service(self.creds)
+            self._local.service = service
+        return service
+    
+    def _ensure_fresh(self):
+        if self.creds.valid and not _expires_soon(self.creds):
+            return
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited
+            if self.creds.valid and not _expires_soon(self.creds):
+                return
+            self.creds.refresh(_refresh_request)
+            if self._on_refresh:
+                self._on_refresh(self.creds)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def _save_token_file(creds):
+    """Save the credentials for the next run."""
+    with open(TOKEN_FILE, "w") as token:
+        token.write(creds.to_json())
+
+
+def _load_credentials():
+    """Load credentials from token.json, running the browser login flow if needed."""
     creds = None
     # The file token.json stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -21,24 +108,131 @@ def get_authenticated_service():
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
     
+    # Expired credentials with a refresh token are refreshed by _CachedClient
+    if creds and (creds.valid or creds.refresh_token):
+        return creds
+    
     # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not os.path.exists(CREDENTIALS_FILE):
-                raise FileNotFoundError(f"Could not find {CREDENTIALS_FILE}. Please download it from Google Cloud Console.")
-            
-            flow = InstalledAppFlow.from_client_secrets_file(
-                CREDENTIALS_FILE, SCOPES
-            )
-            creds = flow.run_local_server(port=0)
-            
-        # Save the credentials for the next run
-        with open(TOKEN_FILE, "w") as token:
-            token.write(creds.to_json())
-
-    return build("people", "v1", credentials=creds)
+    if not os.path.exists(CREDENTIALS_FILE):
+        raise FileNotFoundError(f"Could not find {CREDENTIALS_FILE}. Please download it from Google Cloud Console.")
+    
+    flow = InstalledAppFlow.from_client_secrets_file(
+        CREDENTIALS_FILE, SCOPES
+    )
+    creds = flow.run_local_server(port=0)
+    _save_token_file(creds)
+    return creds
+
+
+# PERF: LRU pool of per-user clients, keyed by user email
+_user_clients: "OrderedDict[str, tuple]" = OrderedDict()
+_user_clients_lock = threading.Lock()
+
+
+def _evict_idle_clients(now: float):
+    """Drop clients unused for CLIENT_POOL_IDLE_SECONDS (caller holds the pool lock)."""
+    idle_before = now - config.CLIENT_POOL_IDLE_SECONDS
+    while _user_clients:
+        email, (_, last_used) = next(iter(_user_clients.items()))
+        if last_used >= idle_before:
+            break
+        del _user_clients[email]
+        logger.debug(f"Evicted idle People API client for {email}")
+
+
+def _get_user_client(user_email: str) -> Optional[_CachedClient]:
+    """Pooled client for a user's stored credentials, or None if the user never authorized."""
+    now = time.monotonic()
+    with _user_clients_lock:
+        _evict_idle_clients(now)
+        entry = _user_clients.get(user_email)
+        if entry:
+            _user_clients[user_email] = (entry[0], now)
+            _user_clients.move_to_end(user_email)
+            return entry[0]
+    
+    credentials_json = db_service.get_user_credentials(user_email)
+    if not credentials_json:
+        return None
+    
+    creds = Credentials.from_authorized_user_info(json.loads(credentials_json), SCOPES)
+    client = _CachedClient(
+        creds,
+        on_refresh=lambda refreshed: db_service.save_user_credentials(user_email, refreshed.to_json())
+    )
+    
+    with _user_clients_lock:
+        # Another request may have built one meanwhile; keep the pooled client
+        entry = _user_clients.get(user_email)
+        if entry:
+            client = entry[0]
+        _user_clients[user_email] = (client, now)
+        _user_clients.move_to_end(user_email)
+        while len(_user_clients) > config.CLIENT_POOL_MAX_SIZE:
+            _user_clients.popitem(last=False)
+    return client
+
+
+def store_user_credentials(user_email: str, creds):
+    """
+    Persist a user's OAuth credentials (encrypted) and drop any pooled client
+    so the next call picks up the new authorization.
+    """
+    db_service.save_user_credentials(user_email, creds.to_json())
+    with _user_clients_lock:
+        _user_clients.pop(user_email, None)
+    logger.info(f"Stored Google credentials for {user_email}")
+
+
+def authorize_user_with_code(user_email: str, code: str, redirect_uri: str = None):
+    """
+    Exchange a server auth code from the client's Google Sign-In for
+    offline credentials and store them for the user.
+    
+    The stored sync token came from whichever account synced before (usually
+    the shared token.json one), so it is cleared: the next sync is a full
+    resync of the user's own account, which also prunes the old contacts.
+    
+    Args:
+        user_email: Email of the authenticated user
+        code: Server auth code granted for SCOPES
+        redirect_uri: Redirect URI used by the client, if any
+    """
+    if not os.path.exists(CREDENTIALS_FILE):
+        raise FileNotFoundError(f"Could not find {CREDENTIALS_FILE}. Please download it from Google Cloud Console.")
+    
+    flow = Flow.from_client_secrets_file(
+        CREDENTIALS_FILE, SCOPES, redirect_uri=redirect_uri or 'postmessage'
+    )
+    flow.fetch_token(code=code)
+    store_user_credentials(user_email, flow.credentials)
+    db_service.clear_sync_token(user_email)
+
+
+def get_authenticated_service(user_email: str = None):
+    """
+    Returns an authorized People API service.
+    
+    With user_email, the user's stored credentials are used through a pooled
+    client; users who have not authorized yet fall back to the shared
+    token.json credentials.
+    
+    PERF: Credentials are kept in memory, the discovery document is the
+    bundled static copy, and each thread reuses its own service/transport,
+    so repeated calls cost almost nothing.
+    """
+    if user_email:
+        client = _get_user_client(user_email)
+        if client:
+            return client.service()
+        logger.debug(f"No stored credentials for {user_email}, using token.json")
+    
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = _CachedClient(_load_credentials(), on_refresh=_save_token_file)
+    return _default_client.service()
 
 if __name__ == "__main__":
     print("Attempting to authenticate...")
@@ -1,144 +1,200 @@
 from backend.services.auth_service import get_authenticated_service
 from backend.services import db_service
-import phonenumbers
+from backend.services.push_service import merge_phone_numbers
+from backend.services.phone_service import analyze_batch
+from backend.core.config import config
+from googleapiclient.errors import HttpError
+from datetime import datetime
+from itertools import islice
 import json
+import logging
 
-def sync_contacts_from_google(user_email: str):
+logger = logging.getLogger(__name__)
+
+# People API caps connections.list at 1000 results per page
+SYNC_PAGE_SIZE = 1000
+SYNC_PERSON_FIELDS = 'names,phoneNumbers,metadata'
+EXPIRED_SYNC_TOKEN_REASON = 'EXPIRED_SYNC_TOKEN'
+
+def iter_connection_pages(service, page_size: int = SYNC_PAGE_SIZE, sync_token: str = None):
     """
-    1. Connects to Google
-    2. Fetches all contacts
-    3. Saves them to DB
+    Yields raw connections.list responses one page at a time,
+    following nextPageToken until Google reports no more pages.
+    
+    A sync token is always requested, so the last page carries the
+    nextSyncToken for the following incremental sync.
     
     Args:
-        user_email: Email of the authenticated user
+        service: Authenticated People API service
+        page_size: Number of connections to request per page
+        sync_token: Token from a previous sync; only changes since then are returned
     """
-    service = get_authenticated_service()
-    
-    # connections.list is the API to get contacts
-    # We ask for names and phoneNumbers
-    results = service.people().connections().list(
-        resourceName='people/me',
-        pageSize=1000,
-        personFields='names,phoneNumbers,metadata'
-    ).execute()
-    
-    connections = results.get('connections', [])
+    page_token = None
+    while True:
+        params = {
+            'resourceName': 'people/me',
+            'pageSize': page_size,
+            'personFields': SYNC_PERSON_FIELDS,
+            'requestSyncToken': True
+        }
+        if sync_token:
+            params['syncToken'] = sync_token
+        if page_token:
+            params['pageToken'] = page_token
+            
+        response = service.people().connections().list(**params).execute()
+        yield response
+        
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+def _is_expired_sync_token(error: HttpError) -> bool:
+    """
+    Whether Google rejected the sync token as too old.
     
-    # Save to Local DB with user association
-    count = db_service.save_contacts(connections, user_email)
-    return {"status": "success", "synced_count": count, "total_from_google": len(connections)}
+    The People API answers 400 FAILED_PRECONDITION with an ErrorInfo detail
+    whose reason is EXPIRED_SYNC_TOKEN; older responses used 410 Gone.
+    """
+    if error.resp.status == 410:
+        return True
+    if error.resp.status != 400:
+        return False
+    try:
+        body = json.loads(error.content.decode('utf-8')).get('error', {})
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return False
+    reasons = [detail.get('reason') for detail in body.get('details', []) if isinstance(detail, dict)]
+    reasons += [item.get('reason') for item in body.get('errors', []) if isinstance(item, dict)]
+    return EXPIRED_SYNC_TOKEN_REASON in reasons
 
-def detect_country_code(phone: str) -> str:
+def sync_contacts_from_google(user_email: str, progress_callback=None, full_resync: bool = False, service=None):
     """
-    Intelligently detects the country code for a phone number.
+    1. Connects to Google
+    2. Streams every page of contacts (follows nextPageToken)
+    3. Upserts each page into the DB as it arrives
     
-    Detection Strategy:
-    1. If number already has country code (starts with +), extract region
-    2. Try to parse with multiple common regions and see which validates
-    3. Use number length and pattern matching as hints
-    4. Default to US if ambiguous (most common international format)
+    If a sync token from a previous sync is stored, only the people that
+    changed since then are fetched and deleted people are removed locally.
+    An expired token falls back to a full resync.
     
-    Returns the detected region code (e.g., "US", "IN", "GB")
-    """
-    # Clean the number for analysis
-    clean_phone = phone.strip().replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    Memory stays bounded by the page size: a page is written and
+    released before the next one is requested.
     
-    # If already has country code, try to detect it
-    if clean_phone.startswith('+'):
-        try:
-            parsed = phonenumbers.parse(clean_phone, None)
-            region = phonenumbers.region_code_for_number(parsed)
-            if region:
-                return region
-        except:
-            pass
-    
-    # Common country patterns and their typical number lengths (without country code)
-    # Format: (region_code, [typical_lengths], [specific_patterns])
-    country_patterns = [
-        ("US", [10], ["1"]),        # US/Canada: 10 digits, often starts with area code
-        ("IN", [10], ["91", "0"]),  # India: 10 digits, may start with 91 or 0
-        ("GB", [10, 11], ["44"]),   # UK: 10-11 digits
-        ("AU", [9, 10], ["61"]),    # Australia: 9-10 digits
-        ("DE", [10, 11], ["49"]),   # Germany: 10-11 digits
-    ]
+    Args:
+        user_email: Email of the authenticated user
+        progress_callback: Optional callable receiving a progress dict after each page
+        full_resync: Ignore the stored sync token and re-download everything
+        service: People API service to use (defaults to the authenticated client)
+    """
+    if service is None:
+        service = get_authenticated_service(user_email)
     
-    # Try each region and check if the number is valid
-    for region, lengths, _ in country_patterns:
+    sync_token = None if full_resync else db_service.get_sync_token(user_email)
+    if sync_token:
         try:
-            parsed = phonenumbers.parse(clean_phone, region)
-            if phonenumbers.is_valid_number(parsed):
-                return region
-        except:
-            continue
-    
-    # Fallback: Use number length heuristics
-    digits_only = ''.join(filter(str.isdigit, clean_phone))
-    
-    # 10 digits without country code - could be US or IN
-    if len(digits_only) == 10:
-        # Check for US-style area codes (first digit 2-9)
-        if digits_only[0] in '23456789':
-            return "US"
-        # Indian mobile numbers typically start with 6, 7, 8, or 9
-        if digits_only[0] in '6789':
-            return "IN"
-    
-    # 11 digits starting with 1 - likely US/Canada
-    if len(digits_only) == 11 and digits_only.startswith('1'):
-        return "US"
-    
-    # 12+ digits starting with 91 - likely India
-    if len(digits_only) >= 12 and digits_only.startswith('91'):
-        return "IN"
-    
-    # Default to US as it's the most common international format
-    return "US"
+            return _run_sync(service, user_email, sync_token, progress_callback)
+        except HttpError as e:
+            if not _is_expired_sync_token(e):
+                raise
+            logger.info(f"Sync token expired for {user_email}, falling back to full resync")
+            db_service.clear_sync_token(user_email)
+    
+    return _run_sync(service, user_email, None, progress_callback)
 
-def parse_and_validate(phone: str, default_region: str = None):
-    """
-    Parses a phone number and returns the E.164 format if valid.
-    If no default_region is provided, intelligently detects the country.
-    Returns None if invalid.
-    """
-    if default_region is None:
-        default_region = detect_country_code(phone)
+def _run_sync(service, user_email: str, sync_token: str, progress_callback):
+    """Runs one full (sync_token=None) or incremental sync pass."""
+    incremental = sync_token is not None
+    started_at = datetime.now().isoformat()
+    
+    pages_fetched = 0
+    synced_count = 0
+    deleted_count = 0
+    total_from_google = 0
+    next_sync_token = None
+    
+    for response in iter_connection_pages(service, sync_token=sync_token):
+        connections = response.get('connections', [])
+        
+        # Deleted people only show up in incremental responses
+        deleted = [
+            person['resourceName'] for person in connections
+            if person.get('metadata', {}).get('deleted')
+        ]
+        changed = [
+            person for person in connections
+            if not person.get('metadata', {}).get('deleted')
+        ]
+        
+        # Save this page to Local DB with user association.
+        # PERF: Sync runs on a background worker, so analysis may use the process pool
+        synced_count += db_service.save_contacts(changed, user_email, parallel_analysis=True)
+        if deleted:
+            deleted_count += db_service.delete_contacts(deleted, user_email)
+        total_from_google += len(connections)
+        pages_fetched += 1
+        next_sync_token = response.get('nextSyncToken') or next_sync_token
+        
+        progress = {
+            "mode": "incremental" if incremental else "full",
+            "pages_fetched": pages_fetched,
+            "synced_count": synced_count,
+            "deleted_count": deleted_count,
+            "total_people": response.get('totalPeople')
+        }
+        logger.info(f"Sync page {pages_fetched} for {user_email}: {synced_count} contacts written")
+        if progress_callback:
+            progress_callback(progress)
+    
+    # A full sync sees every live contact, so anything older is gone on Google's side
+    if not incremental:
+        deleted_count += db_service.delete_contacts_not_synced_since(user_email, started_at)
+    
+    if next_sync_token:
+        db_service.save_sync_token(user_email, next_sync_token)
     
-    try:
-        parsed = phonenumbers.parse(phone, default_region)
-        if phonenumbers.is_valid_number(parsed):
-            return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
-    except phonenumbers.NumberParseException:
-        pass
-    return None
+    return {
+        "status": "success",
+        "mode": "incremental" if incremental else "full",
+        "synced_count": synced_count,
+        "deleted_count": deleted_count,
+        "total_from_google": total_from_google,
+        "pages_fetched": pages_fetched
+    }
 
-def fix_phone_numbers(default_country_code: str = None):
+def fix_phone_numbers(user_email: str, default_country_code: str = None):
     """
     1. Reads contacts from DB
     2. Uses libphonenumber to parse and format
     3. Returns diff if formatting changes
     
     If default_country_code is None, uses intelligent detection per number.
+    Runs in-process; only background sync jobs use the analysis process pool.
+    
+    Args:
+        user_email: Email of the authenticated user
+        default_country_code: ISO country code for numbers without country prefix
     """
-    all_contacts = db_service.get_all_contacts()
+    contacts = (
+        c for c in db_service.iter_contacts(user_email, fields=('given_name', 'phone_number'))
+        if c['phone_number']
+    )
     
     fixed_list = []
     
-    for contact in all_contacts:
-        original_phone = contact['phone_number']
-        if not original_phone:
-            continue
-            
-        # Parse logic - uses intelligent detection if no default provided
-        formatted = parse_and_validate(original_phone, default_country_code)
-        
-        if formatted:
-            clean_original = original_phone.replace(" ", "").replace("-", "")
-            if clean_original != formatted:
-                 fixed_list.append({
+    # PERF: Stream the book in bounded batches instead of materializing it
+    while True:
+        batch = list(islice(contacts, config.ANALYSIS_BATCH_SIZE))
+        if not batch:
+            break
+        analyses = analyze_batch([c['phone_number'] for c in batch], [default_country_code])
+        for contact, by_region in zip(batch, analyses):
+            analysis = by_region[default_country_code]
+            if analysis['needs_fix']:
+                fixed_list.append({
                     "name": contact['given_name'],
-                    "old": original_phone,
-                    "new": formatted
+                    "old": contact['phone_number'],
+                    "new": analysis['suggested']
                 })
             
     return {"status": "analyzed", "needs_fixing_count": len(fixed_list), "preview": fixed_list}
@@ -172,10 +228,11 @@ def create_dummy_contact(name: str, phone: str):
         "phone": phone
     }
 
-def update_contact(resource_name: str, etag: str, user_email: str, new_phone: str = None, new_name: str = None):
+def update_contact(resource_name: str, etag: str, user_email: str, new_phone: str = None, new_name: str = None, original_phone: str = None):
     """
     Updates the phone number and/or name of an existing contact.
     Fetches fresh data first to ensure ETag is valid.
+    For many contacts use push_service.push_staged_changes instead.
     
     Args:
         resource_name: Google contact resource name
@@ -183,8 +240,9 @@ def update_contact(resource_name: str, etag: str, user_email: str, new_phone: st
         user_email: Email of the authenticated user
         new_phone: New phone number (optional)
         new_name: New name (optional)
+        original_phone: Number being replaced; other numbers are kept (optional)
     """
-    service = get_authenticated_service()
+    service = get_authenticated_service(user_email)
     
     # [ROBUSTNESS] Fetch latest Etag from Google to prevent 400 Stale Error
     latest_person = service.people().get(
@@ -198,7 +256,9 @@ def update_contact(resource_name: str, etag: str, user_email: str, new_phone: st
     update_fields = []
     
     if new_phone:
-        body["phoneNumbers"] = [{"value": new_phone}]
+        body["phoneNumbers"] = merge_phone_numbers(
+            latest_person.get('phoneNumbers', []), original_phone, new_phone
+        )
         update_fields.append('phoneNumbers')
         
     if new_name:
@@ -219,50 +279,58 @@ def update_contact(resource_name: str, etag: str, user_email: str, new_phone: st
     
     return result
 
-def get_contacts_missing_extension(user_email: str, default_region: str = "US"):
+def get_contacts_missing_extension(user_email: str, default_region: str = "US",
+                                   exclude_staged: bool = False, after: str = None, limit: int = None):
     """
-    Retrieves all contacts that deviate from the standard E.164 format.
+    Retrieves all contacts that deviate from the standard E.164 format,
+    ordered by resource_name.
+    
+    PERF: Reads the phone_analysis index and the update_time column built
+    at ingest instead of decrypting and parsing every contact on each request.
     
     Args:
         user_email: Email of the authenticated user
         default_region: ISO country code for numbers without country prefix (e.g., "US", "IN")
+        exclude_staged: Skip contacts that already have a staged change
+        after: Keyset cursor (resource_name of the last contact already seen)
+        limit: Maximum number of contacts
     """
-    all_contacts = db_service.get_all_contacts(user_email)
+    db_service.ensure_phone_analysis(user_email, default_region)
     
     missing_ext_list = []
     
-    for contact in all_contacts:
-        phone = contact['phone_number']
-        if not phone:
-            continue
-        
-        # Use user-specified default region for parsing
-        formatted = parse_and_validate(phone, default_region)
-        
-        # If it's a valid number BUT the original raw string doesn't match the E.164 format
-        # This catches: 999... (missing +91), 099... (extra 0), 080... (landline)
-        if formatted:
-            clean_original = phone.replace(" ", "").replace("-", "")
-            if clean_original != formatted:
-                # Try to extract updated_at
-                updated_at = None
-                if contact.get('raw_json'):
-                    try:
-                        data = json.loads(contact['raw_json'])
-                        if 'metadata' in data and 'sources' in data['metadata']:
-                            for source in data['metadata']['sources']:
-                                if 'updateTime' in source:
-                                    updated_at = source['updateTime']
-                                    break
-                    except:
-                        pass
-
-                missing_ext_list.append({
-                    "resource_name": contact['resource_name'],
-                    "name": contact['given_name'],
-                    "phone": phone,
-                    "suggested": formatted,
-                    "updated_at": updated_at
-                })
+    fixes = db_service.iter_phone_fixes(
+        user_email, default_region, exclude_staged=exclude_staged, after=after, limit=limit
+    )
+    for contact in fixes:
+        missing_ext_list.append({
+            "resource_name": contact['resource_name'],
+            "name": contact['given_name'],
+            "phone": contact['phone_number'],
+            "suggested": contact['suggested'],
+            "updated_at": contact['update_time']
+        })
             
     return missing_ext_list
+
+def analyze_regions(user_email: str, regions):
+    """
+    Counts contacts needing a fix under each candidate default region.
+    
+    PERF: Builds any missing regions in a single decrypt/parse pass and
+    counts from the phone_analysis index, instead of running the full
+    missing-extension scan once per region.
+    
+    Args:
+        user_email: Email of the authenticated user
+        regions: ISO country codes to evaluate
+        
+    Returns:
+        List of {region, count} for regions with at least one fix, in input order
+    """
+    db_service.ensure_phone_analysis(user_email, regions)
+    counts = db_service.count_phone_fixes_by_region(user_email, regions)
+    return [
+        {"region": region, "count": counts[region]}
+        for region in regions if counts.get(region)
+    ]
@@ -4,23 +4,44 @@ import os
 import threading
 from contextlib import contextmanager
 from datetime import datetime
+from backend.core.config import config
 from backend.core.security import FieldEncryption
+from backend.services import phone_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 DB_FILE = 'backend/contacts.db'
 
+# Region indexed at ingest for users who have not requested any region yet
+DEFAULT_ANALYSIS_REGION = 'US'
+
 # PERF: Thread-local storage for connection pooling
 _local = threading.local()
 
 def get_db_connection():
     """Get or create a thread-local database connection."""
     if not hasattr(_local, 'conn') or _local.conn is None:
-        _local.conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        _local.conn = sqlite3.connect(DB_FILE, check_same_thread=False, timeout=30)
         _local.conn.row_factory = sqlite3.Row
+        # PERF: WAL lets request threads read while sync workers write
+        _local.conn.execute('PRAGMA journal_mode=WAL')
     return _local.conn
 
+def _iter_rows(cursor, batch_size: int = None):
+    """
+    Yield rows of an executed query in fetchmany batches.
+    
+    PERF: Only one batch of raw rows is held at a time instead of the whole
+    result set from fetchall().
+    """
+    batch_size = batch_size or config.DB_FETCH_BATCH_SIZE
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
 @contextmanager
 def get_db():
     """Context manager for database operations with connection reuse."""
@@ -65,6 +86,125 @@ def init_db():
         )
     ''')
     
+    # Per-user People API sync state for incremental syncs
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            user_email TEXT PRIMARY KEY,
+            sync_token TEXT,
+            updated_at TEXT
+        )
+    ''')
+    
+    # Per-user Google OAuth credentials (encrypted authorized-user JSON)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_credentials (
+            user_email TEXT PRIMARY KEY,
+            credentials TEXT,
+            updated_at TEXT
+        )
+    ''')
+    
+    # One row per phone number of a contact (phoneNumbers[position])
+    # status is the phone_service.classify_numbers bucket; normalized is the
+    # E.164 form for canonical numbers
+    has_contact_phones = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contact_phones'"
+    ).fetchone() is not None
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contact_phones (
+            user_email TEXT,
+            resource_name TEXT,
+            position INTEGER,
+            type TEXT,
+            value TEXT,
+            normalized TEXT,
+            status TEXT,
+            PRIMARY KEY (user_email, resource_name, position)
+        )
+    ''')
+    
+    # Migration: phone_analysis was keyed per contact before contact_phones;
+    # it is derived data, so drop it and let it rebuild per number
+    analysis_columns = [row['name'] for row in conn.execute('PRAGMA table_info(phone_analysis)')]
+    if analysis_columns and 'position' not in analysis_columns:
+        conn.execute('DROP TABLE phone_analysis')
+        logger.info("Dropped per-contact phone_analysis table for per-number rebuild")
+    
+    # Precomputed phone analysis per user, phone number and default region
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS phone_analysis (
+            user_email TEXT,
+            resource_name TEXT,
+            position INTEGER,
+            region TEXT,
+            suggested TEXT,
+            needs_fix INTEGER,
+            detected_region TEXT,
+            PRIMARY KEY (user_email, region, resource_name, position)
+        )
+    ''')
+    
+    # Regions whose phone_analysis index is built for a user, and the data
+    # version it was last brought up to date at. Also marks books without numbers.
+    has_analysis_regions = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'phone_analysis_regions'"
+    ).fetchone() is not None
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS phone_analysis_regions (
+            user_email TEXT,
+            region TEXT,
+            analyzed_version INTEGER,
+            analyzed_at TEXT,
+            PRIMARY KEY (user_email, region)
+        )
+    ''')
+    if not has_analysis_regions:
+        # Older indexes stored canonical numbers without suggestion/region;
+        # the index is derived data, so rebuild it on demand
+        conn.execute('DELETE FROM phone_analysis')
+    
+    # Per-user data version, bumped by every write a read endpoint can see (ETags)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_data_version (
+            user_email TEXT PRIMARY KEY,
+            version INTEGER,
+            updated_at TEXT
+        )
+    ''')
+    
+    # Background sync jobs (shared by all uvicorn workers)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_email TEXT,
+            status TEXT,
+            mode TEXT,
+            pages_fetched INTEGER DEFAULT 0,
+            rows_written INTEGER DEFAULT 0,
+            deleted_count INTEGER DEFAULT 0,
+            error TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+    
+    # Live throughput of each user's latest push (polled while the push request runs)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS push_progress (
+            user_email TEXT PRIMARY KEY,
+            status TEXT,
+            contacts_total INTEGER DEFAULT 0,
+            contacts_done INTEGER DEFAULT 0,
+            requests INTEGER DEFAULT 0,
+            elapsed_seconds REAL DEFAULT 0,
+            contacts_per_second REAL DEFAULT 0,
+            started_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+    
     # Migration: Add user_email column to existing tables if needed
     try:
         conn.execute('ALTER TABLE contacts ADD COLUMN user_email TEXT')
@@ -78,30 +218,95 @@ def init_db():
     except sqlite3.OperationalError:
         pass
     
+    try:
+        conn.execute('ALTER TABLE contacts ADD COLUMN synced_at TEXT')
+        logger.info("Added synced_at column to contacts table")
+    except sqlite3.OperationalError:
+        pass
+    
+    try:
+        conn.execute('ALTER TABLE contacts ADD COLUMN update_time TEXT')
+        logger.info("Added update_time column to contacts table")
+        _backfill_update_time(conn)
+    except sqlite3.OperationalError:
+        pass
+    
     # Create indexes for performance
     try:
         conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_user ON contacts(user_email)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_update_time ON contacts(user_email, update_time)')
         conn.execute('CREATE INDEX IF NOT EXISTS idx_staged_user ON staged_changes(user_email)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_staged_user_created ON staged_changes(user_email, created_at, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_user_resource ON contacts(user_email, resource_name)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sync_jobs_user ON sync_jobs(user_email, status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_phone_analysis_fix ON phone_analysis(user_email, region, needs_fix)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_phone_analysis_contact ON phone_analysis(user_email, resource_name)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_contact_phones_user ON contact_phones(user_email)')
+        # No query filters contact_phones on status alone; the index only cost writes
+        conn.execute('DROP INDEX IF EXISTS idx_contact_phones_status')
     except sqlite3.OperationalError:
         pass
+    
+    if not has_contact_phones:
+        _backfill_contact_phones(conn)
         
     conn.commit()
-    conn.close()
     logger.info("Database initialized successfully")
 
-def save_contacts(contacts_list, user_email: str):
+def _backfill_update_time(conn):
+    """One-time migration: copy updateTime out of stored raw_json."""
+    rows = conn.execute('SELECT resource_name, user_email, raw_json FROM contacts').fetchall()
+    updates = []
+    for row in rows:
+        try:
+            person = json.loads(FieldEncryption.decrypt(row['raw_json']))
+        except Exception as e:
+            logger.warning(f"Skipping update_time backfill for {row['resource_name']}: {type(e).__name__}")
+            continue
+        updates.append((_extract_update_time(person), row['resource_name'], row['user_email']))
+    conn.executemany(
+        'UPDATE contacts SET update_time = ? WHERE resource_name = ? AND user_email = ?',
+        updates
+    )
+    if updates:
+        logger.info(f"Backfilled update_time for {len(updates)} contacts")
+
+def _backfill_contact_phones(conn):
+    """One-time migration: split stored contacts' phoneNumbers into contact_phones."""
+    rows = conn.execute('SELECT resource_name, user_email, raw_json FROM contacts').fetchall()
+    for row in rows:
+        try:
+            person = json.loads(FieldEncryption.decrypt(row['raw_json']))
+        except Exception as e:
+            logger.warning(f"Skipping phone backfill for {row['resource_name']}: {type(e).__name__}")
+            continue
+        _write_contact_phones(conn, row['user_email'], [(row['resource_name'], person.get('phoneNumbers', []))])
+    if rows:
+        logger.info(f"Backfilled contact_phones for {len(rows)} contacts")
+
+def save_contacts(contacts_list, user_email: str, parallel_analysis: bool = False):
     """
     Saves a list of contact dictionaries to the DB with encryption.
     contacts_list items must have: resourceName, etag, names, phoneNumbers
     
+    PERF: Every row is encrypted and every changed number analyzed before
+    the write transaction starts, so the write lock is only held for the
+    inserts themselves (not for analysis and encryption of a whole page).
+    
     Args:
         contacts_list: List of contact dictionaries from Google API
         user_email: Email of the authenticated user
+        parallel_analysis: Let phone analysis use the process pool (sync jobs only)
     """
     conn = get_db_connection()
-    cursor =  conn.cursor()
+    synced_at = datetime.now().isoformat()
     
-    count = 0
+    # Only contacts that are new or whose etag changed get their numbers rewritten and re-analyzed
+    existing_etags = _get_etags(conn, [person.get('resourceName') for person in contacts_list], user_email)
+    regions = _get_indexed_regions(conn, user_email)
+    changed = []
+    
+    contact_rows = []
     for person in contacts_list:
         resource_name = person.get('resourceName')
         etag = person.get('etag')
@@ -118,73 +323,877 @@ def save_contacts(contacts_list, user_email: str):
         if phones:
             phone_number = phones[0].get('value')
             
+        # Plain column so list endpoints never decrypt raw_json for it
+        update_time = _extract_update_time(person)
+        
         raw_json = json.dumps(person)
         
         # Encrypt sensitive fields
         encrypted_phone = FieldEncryption.encrypt(phone_number) if phone_number else None
         encrypted_raw = FieldEncryption.encrypt(raw_json)
-
-        cursor.execute('''
+        
+        contact_rows.append(
+            (resource_name, user_email, etag, given_name, encrypted_phone, encrypted_raw, synced_at, update_time)
+        )
+        
+        if resource_name not in existing_etags or existing_etags[resource_name] != etag:
+            changed.append((resource_name, phones))
+    
+    phone_rows, changed_phones = _contact_phone_rows(user_email, changed)
+    analysis_rows = _phone_analysis_rows(user_email, changed_phones, regions, parallel_analysis) if regions else []
+    
+    # One short write transaction for the whole page
+    count = len(contact_rows)
+    try:
+        conn.executemany('''
             INSERT OR REPLACE INTO contacts 
-            (resource_name, user_email, etag, given_name, phone_number, raw_json)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (resource_name, user_email, etag, given_name, encrypted_phone, encrypted_raw))
-        count += 1
+            (resource_name, user_email, etag, given_name, phone_number, raw_json, synced_at, update_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', contact_rows)
         
-    conn.commit()
-    conn.close()
-    logger.info(f"Saved {count} contacts for user {user_email}")
+        if changed:
+            _write_contact_phones(conn, user_email, changed, phone_rows)
+            # Also drops rows of regions still being built, so the build picks them up again
+            conn.executemany(
+                'DELETE FROM phone_analysis WHERE user_email = ? AND resource_name = ?',
+                [(user_email, resource_name) for resource_name, _ in changed]
+            )
+            conn.executemany('''
+                INSERT OR REPLACE INTO phone_analysis
+                (user_email, resource_name, position, region, suggested, needs_fix, detected_region)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', analysis_rows)
+            
+            # A region built after the read above is missing these contacts' rows;
+            # unmark it so the next ensure_phone_analysis fills them in
+            late = [region for region in _get_indexed_regions(conn, user_email) if region not in regions]
+            if late:
+                conn.executemany(
+                    'DELETE FROM phone_analysis_regions WHERE user_email = ? AND region = ?',
+                    [(user_email, region) for region in late]
+                )
+        
+        if count:
+            _bump_data_version(conn, user_email)
+            if regions:
+                _mark_regions_analyzed(conn, user_email, regions)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    # First sync for this user: build the default region over the whole book
+    # so an index is never left covering only the contacts of one page
+    if not regions:
+        ensure_phone_analysis(user_email, DEFAULT_ANALYSIS_REGION, parallel_analysis)
+    
+    logger.info(f"Saved {count} contacts for user {user_email} ({len(changed)} changed)")
     return count
 
-def get_all_contacts(user_email: str):
-    """Get all contacts for a specific user with decryption."""
+def _extract_update_time(person: dict):
+    """First updateTime among the person's metadata sources, or None."""
+    for source in person.get('metadata', {}).get('sources', []):
+        if 'updateTime' in source:
+            return source['updateTime']
+    return None
+
+def _contact_phone_rows(user_email: str, contacts) -> tuple:
+    """
+    Classify and encrypt the numbers of the given contacts (no database access).
+    
+    Args:
+        user_email: Email of the authenticated user
+        contacts: List of (resource_name, phoneNumbers list from the People API)
+        
+    Returns:
+        (contact_phones rows, analysis input for those numbers: (resource_name,
+        position, plaintext value, or None for garbage the pre-filter already settled))
+    """
+    entries = [
+        (resource_name, position, phone.get('type'), phone.get('value'))
+        for resource_name, phones in contacts
+        for position, phone in enumerate(phones or [])
+    ]
+    buckets = phone_service.classify_numbers([value for _, _, _, value in entries])
+    
+    rows = [
+        (
+            user_email, resource_name, position, phone_type,
+            FieldEncryption.encrypt(value) if value else None,
+            FieldEncryption.encrypt(phone_service.strip_formatting(value)) if status == phone_service.CANONICAL else None,
+            status
+        )
+        for (resource_name, position, phone_type, value), status in zip(entries, buckets)
+    ]
+    phones = [
+        (resource_name, position, value if status != phone_service.GARBAGE else None)
+        for (resource_name, position, _, value), status in zip(entries, buckets)
+    ]
+    return rows, phones
+
+def _write_contact_phones(conn, user_email: str, contacts, rows=None):
+    """
+    Replace the contact_phones rows of the given contacts (caller commits).
+    
+    Args:
+        conn: Database connection
+        user_email: Email of the authenticated user
+        contacts: List of (resource_name, phoneNumbers list from the People API)
+        rows: Rows from _contact_phone_rows for these contacts (built here if None)
+    """
+    if rows is None:
+        rows, _ = _contact_phone_rows(user_email, contacts)
+    conn.executemany(
+        'DELETE FROM contact_phones WHERE user_email = ? AND resource_name = ?',
+        [(user_email, resource_name) for resource_name, _ in contacts]
+    )
+    conn.executemany('''
+        INSERT INTO contact_phones
+        (user_email, resource_name, position, type, value, normalized, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+def _get_etags(conn, resource_names, user_email: str) -> dict:
+    """Stored etags for the given contacts (missing contacts are omitted)."""
+    etags = {}
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(resource_names), 500):
+        chunk = resource_names[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT resource_name, etag FROM contacts WHERE user_email = ? AND resource_name IN ({placeholders})',
+            (user_email, *chunk)
+        ).fetchall()
+        etags.update({row['resource_name']: row['etag'] for row in rows})
+    return etags
+
+def delete_contacts(resource_names, user_email: str) -> int:
+    """
+    Deletes contacts that were removed on Google's side.
+    
+    Args:
+        resource_names: Iterable of Google contact resource names
+        user_email: Email of the authenticated user
+        
+    Returns:
+        Number of rows deleted
+    """
     conn = get_db_connection()
-    contacts = conn.execute(
-        'SELECT * FROM contacts WHERE user_email = ?', 
-        (user_email,)
-    ).fetchall()
-    conn.close()
+    params = [(resource_name, user_email) for resource_name in resource_names]
+    cursor = conn.executemany(
+        'DELETE FROM contacts WHERE resource_name = ? AND user_email = ?',
+        params
+    )
+    conn.executemany(
+        'DELETE FROM phone_analysis WHERE resource_name = ? AND user_email = ?',
+        params
+    )
+    conn.executemany(
+        'DELETE FROM contact_phones WHERE resource_name = ? AND user_email = ?',
+        params
+    )
+    if cursor.rowcount:
+        _bump_data_version(conn, user_email)
+    conn.commit()
+    deleted = cursor.rowcount
+    if deleted:
+        logger.info(f"Deleted {deleted} contacts for user {user_email}")
+    return deleted
+
+def delete_contacts_not_synced_since(user_email: str, synced_since: str) -> int:
+    """
+    Deletes contacts a full sync did not see again (removed on Google's side).
     
-    # Decrypt sensitive fields
-    decrypted_contacts = []
-    for row in contacts:
-        contact = dict(row)
-        if contact.get('phone_number'):
-            contact['phone_number'] = FieldEncryption.decrypt(contact['phone_number'])
-        if contact.get('raw_json'):
-            contact['raw_json'] = FieldEncryption.decrypt(contact['raw_json'])
-        decrypted_contacts.append(contact)
+    Args:
+        user_email: Email of the authenticated user
+        synced_since: ISO timestamp taken before the full sync started
+        
+    Returns:
+        Number of rows deleted
+    """
+    conn = get_db_connection()
+    cursor = conn.execute(
+        'DELETE FROM contacts WHERE user_email = ? AND (synced_at IS NULL OR synced_at < ?)',
+        (user_email, synced_since)
+    )
+    if cursor.rowcount:
+        for table in ('phone_analysis', 'contact_phones'):
+            conn.execute(f'''
+                DELETE FROM {table} WHERE user_email = ? AND resource_name NOT IN (
+                    SELECT resource_name FROM contacts WHERE user_email = ?
+                )
+            ''', (user_email, user_email))
+        _bump_data_version(conn, user_email)
+    conn.commit()
+    deleted = cursor.rowcount
+    if deleted:
+        logger.info(f"Pruned {deleted} stale contacts for user {user_email}")
+    return deleted
+
+# Columns a contact read can project; phone_number and raw_json are encrypted
+CONTACT_FIELDS = (
+    'resource_name', 'user_email', 'etag', 'given_name',
+    'phone_number', 'raw_json', 'synced_at', 'update_time'
+)
+
+# Everything but the raw_json blob (default for GET /contacts/)
+CONTACT_LIST_FIELDS = tuple(field for field in CONTACT_FIELDS if field != 'raw_json')
+
+class LazyContact(dict):
+    """
+    Contact row whose raw_json is decrypted on first access.
+    
+    PERF: raw_json is by far the largest column; until something reads it
+    (indexing, get, iteration, copying) only the ciphertext is held.
+    """
+    
+    def __init__(self, fields, encrypted_raw_json=None, raw_json_pending=False):
+        super().__init__(fields)
+        self._encrypted_raw_json = encrypted_raw_json
+        self._raw_json_pending = raw_json_pending
     
-    return decrypted_contacts
+    def _load_raw_json(self):
+        if self._raw_json_pending:
+            self._raw_json_pending = False
+            value = self._encrypted_raw_json
+            self._encrypted_raw_json = None
+            super().__setitem__('raw_json', FieldEncryption.decrypt(value) if value else value)
+    
+    def __missing__(self, key):
+        if key == 'raw_json' and self._raw_json_pending:
+            self._load_raw_json()
+            return super().__getitem__(key)
+        raise KeyError(key)
+    
+    def __setitem__(self, key, value):
+        if key == 'raw_json':
+            self._raw_json_pending = False
+            self._encrypted_raw_json = None
+        super().__setitem__(key, value)
+    
+    def __contains__(self, key):
+        return (key == 'raw_json' and self._raw_json_pending) or super().__contains__(key)
+    
+    def __len__(self):
+        return super().__len__() + (1 if self._raw_json_pending else 0)
+    
+    def __iter__(self):
+        self._load_raw_json()
+        return super().__iter__()
+    
+    def get(self, key, default=None):
+        if key == 'raw_json':
+            self._load_raw_json()
+        return super().get(key, default)
+    
+    def keys(self):
+        self._load_raw_json()
+        return super().keys()
+    
+    def values(self):
+        self._load_raw_json()
+        return super().values()
+    
+    def items(self):
+        self._load_raw_json()
+        return super().items()
+    
+    def copy(self):
+        self._load_raw_json()
+        return dict(super().items())
+
+def _contact_columns(fields) -> list:
+    """
+    Validated column list for a projection (resource_name is always included).
+    
+    Raises:
+        ValueError: If a field is not in CONTACT_FIELDS
+    """
+    if fields is None:
+        return list(CONTACT_FIELDS)
+    unknown = [field for field in fields if field not in CONTACT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown contact fields: {', '.join(unknown)}")
+    columns = ['resource_name']
+    columns.extend(field for field in CONTACT_FIELDS if field in fields and field != 'resource_name')
+    return columns
+
+def _row_to_contact(row) -> LazyContact:
+    """Decrypt a projected row: phone_number now, raw_json on first access."""
+    fields = dict(row)
+    raw_json_pending = 'raw_json' in fields
+    encrypted_raw_json = fields.pop('raw_json', None)
+    if fields.get('phone_number'):
+        fields['phone_number'] = FieldEncryption.decrypt(fields['phone_number'])
+    return LazyContact(fields, encrypted_raw_json, raw_json_pending)
+
+def iter_contacts(user_email: str, fields=None, batch_size: int = None,
+                  after: str = None, limit: int = None):
+    """
+    Stream a user's contacts ordered by resource_name, decrypting each batch
+    as it is fetched.
+    
+    Args:
+        user_email: Email of the authenticated user
+        fields: Columns to read (see CONTACT_FIELDS); None reads all.
+                Only selected columns are read and decrypted.
+        batch_size: Rows per fetchmany (default DB_FETCH_BATCH_SIZE)
+        after: Keyset cursor; only contacts with a greater resource_name
+        limit: Maximum number of contacts
+        
+    Yields:
+        LazyContact per contact
+    """
+    conn = get_db_connection()
+    columns = ', '.join(_contact_columns(fields))
+    query = f'SELECT {columns} FROM contacts WHERE user_email = ?'
+    params = [user_email]
+    if after is not None:
+        query += ' AND resource_name > ?'
+        params.append(after)
+    query += ' ORDER BY resource_name'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    cursor = conn.execute(query, params)
+    for row in _iter_rows(cursor, batch_size):
+        yield _row_to_contact(row)
+
+def get_all_contacts(user_email: str, fields=None, after: str = None, limit: int = None):
+    """Get all contacts for a specific user with decryption (list form of iter_contacts)."""
+    return list(iter_contacts(user_email, fields, after=after, limit=limit))
 
 def find_contact_by_name(name: str):
     """Finds a contact by exact given name."""
     conn = get_db_connection()
     row = conn.execute('SELECT * FROM contacts WHERE given_name = ?', (name,)).fetchone()
-    conn.close()
     if row:
         return dict(row)
     return None
 
-def find_contact_by_resource_name(resource_name: str, user_email: str):
-    """Finds a contact by resource name for a specific user."""
+def find_contact_by_resource_name(resource_name: str, user_email: str, fields=None):
+    """Finds a contact by resource name for a specific user (fields as in get_all_contacts)."""
     conn = get_db_connection()
+    columns = ', '.join(_contact_columns(fields))
     row = conn.execute(
-        'SELECT * FROM contacts WHERE resource_name = ? AND user_email = ?', 
+        f'SELECT {columns} FROM contacts WHERE resource_name = ? AND user_email = ?', 
         (resource_name, user_email)
     ).fetchone()
-    conn.close()
     
     if row:
-        contact = dict(row)
-        # Decrypt sensitive fields
-        if contact.get('phone_number'):
-            contact['phone_number'] = FieldEncryption.decrypt(contact['phone_number'])
-        if contact.get('raw_json'):
-            contact['raw_json'] = FieldEncryption.decrypt(contact['raw_json'])
-        return contact
+        return _row_to_contact(row)
     return None
 
+def get_contacts_by_resource_names(resource_names, user_email: str, fields=None) -> dict:
+    """
+    Get several contacts for a user in one query, with decryption.
+    
+    Args:
+        resource_names: Iterable of Google contact resource names
+        user_email: Email of the authenticated user
+        fields: Columns to read (see CONTACT_FIELDS); None reads all
+        
+    Returns:
+        Dict mapping resource_name to contact dict (missing contacts are omitted)
+    """
+    resource_names = list(resource_names)
+    if not resource_names:
+        return {}
+    
+    conn = get_db_connection()
+    columns = ', '.join(_contact_columns(fields))
+    contacts = {}
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(resource_names), 500):
+        chunk = resource_names[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT {columns} FROM contacts WHERE user_email = ? AND resource_name IN ({placeholders})',
+            (user_email, *chunk)
+        ).fetchall()
+        for row in rows:
+            contact = _row_to_contact(row)
+            contacts[contact['resource_name']] = contact
+    return contacts
+
+def get_contact_phones(resource_names, user_email: str) -> dict:
+    """
+    All stored numbers of several contacts, from contact_phones.
+    
+    Returns:
+        Dict mapping resource_name to a phoneNumbers-style list of
+        {"value", "type"} in Google's order (contacts without numbers are omitted)
+    """
+    resource_names = list(resource_names)
+    conn = get_db_connection()
+    phones = {}
+    for start in range(0, len(resource_names), 500):
+        chunk = resource_names[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'''SELECT resource_name, type, value FROM contact_phones
+                WHERE user_email = ? AND resource_name IN ({placeholders})
+                ORDER BY resource_name, position''',
+            (user_email, *chunk)
+        ).fetchall()
+        for row in rows:
+            entry = {"value": FieldEncryption.decrypt(row['value']) if row['value'] else None}
+            if row['type']:
+                entry["type"] = row['type']
+            phones.setdefault(row['resource_name'], []).append(entry)
+    return phones
+
+# ============= PHONE ANALYSIS FUNCTIONS =============
+
+def _get_indexed_regions(conn, user_email: str) -> list:
+    """Regions whose analysis index has been built for a user."""
+    rows = conn.execute(
+        'SELECT region FROM phone_analysis_regions WHERE user_email = ?',
+        (user_email,)
+    ).fetchall()
+    return [row['region'] for row in rows]
+
+def _mark_regions_analyzed(conn, user_email: str, regions):
+    """
+    Record regions as indexed up to the user's current data version,
+    read in the caller's transaction (caller commits).
+    """
+    row = conn.execute(
+        'SELECT version FROM user_data_version WHERE user_email = ?',
+        (user_email,)
+    ).fetchone()
+    version = row['version'] if row else 0
+    now = datetime.now().isoformat()
+    conn.executemany('''
+        INSERT OR REPLACE INTO phone_analysis_regions (user_email, region, analyzed_version, analyzed_at)
+        VALUES (?, ?, ?, ?)
+    ''', [(user_email, region, version, now) for region in regions])
+
+def _phone_analysis_rows(user_email: str, phones, regions, parallel: bool = False) -> list:
+    """
+    Analyze numbers for every region into phone_analysis rows (no database access).
+    
+    Args:
+        user_email: Email of the authenticated user
+        phones: Iterable of (resource_name, position, plaintext value or None)
+        regions: ISO region codes to analyze for
+        parallel: Let analyze_batch use the process pool (sync jobs only)
+    """
+    phones = list(phones)
+    analyses = phone_service.analyze_batch([value for _, _, value in phones], regions, parallel)
+    
+    rows = []
+    for (resource_name, position, _), by_region in zip(phones, analyses):
+        for region, analysis in by_region.items():
+            suggested = analysis['suggested']
+            rows.append((
+                user_email,
+                resource_name,
+                position,
+                region,
+                FieldEncryption.encrypt(suggested) if suggested else None,
+                1 if analysis['needs_fix'] else 0,
+                analysis['detected_region']
+            ))
+    return rows
+
+def _phones_missing_analysis(conn, user_email: str, regions, after=None, limit: int = None) -> list:
+    """
+    contact_phones rows without an analysis row for at least one of the
+    regions, ordered by (resource_name, position) and fetched in full.
+    
+    Args:
+        after: Keyset cursor (resource_name, position); only later rows
+        limit: Maximum number of rows
+    """
+    lacking = ' OR '.join(['''NOT EXISTS (
+              SELECT 1 FROM phone_analysis a
+              WHERE a.user_email = p.user_email AND a.region = ?
+                AND a.resource_name = p.resource_name AND a.position = p.position
+          )'''] * len(regions))
+    query = f'''
+        SELECT p.resource_name, p.position, p.value, p.status FROM contact_phones p
+        WHERE p.user_email = ? AND ({lacking})'''
+    params = [user_email, *regions]
+    if after is not None:
+        query += ' AND (p.resource_name, p.position) > (?, ?)'
+        params.extend(after)
+    query += ' ORDER BY p.resource_name, p.position'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+def _write_missing_analysis(conn, user_email: str, batch, regions, parallel: bool = False):
+    """
+    Analyze a batch of contact_phones rows, then write the results in one
+    short transaction. Numbers rewritten or deleted since the batch was read
+    (ciphertext no longer matches) are skipped.
+    """
+    phones = [
+        (
+            row['resource_name'],
+            row['position'],
+            FieldEncryption.decrypt(row['value']) if row['status'] != phone_service.GARBAGE else None
+        )
+        for row in batch
+    ]
+    ciphertexts = {(row['resource_name'], row['position']): row['value'] for row in batch}
+    rows = _phone_analysis_rows(user_email, phones, regions, parallel)
+    
+    conn.executemany('''
+        INSERT OR REPLACE INTO phone_analysis
+        (user_email, resource_name, position, region, suggested, needs_fix, detected_region)
+        SELECT ?, ?, ?, ?, ?, ?, ?
+        WHERE EXISTS (
+            SELECT 1 FROM contact_phones
+            WHERE user_email = ? AND resource_name = ? AND position = ? AND value IS ?
+        )
+    ''', [
+        (*row, user_email, row[1], row[2], ciphertexts[(row[1], row[2])])
+        for row in rows
+    ])
+    conn.commit()
+
+def ensure_phone_analysis(user_email: str, regions, parallel: bool = False):
+    """
+    Build a user's analysis index for regions the first time they are requested.
+    Afterwards save_contacts keeps them current for changed contacts only.
+    
+    PERF: All missing regions are built in one keyset-batched pass over
+    contact_phones, and garbage numbers are never decrypted. Every number is
+    decrypted once no matter how many regions are requested. Each batch is
+    fetched in full and analyzed before its own short write transaction, so
+    no read cursor stays open across a write and syncs are never locked out
+    for the whole build. Built regions are recorded in
+    phone_analysis_regions, so a book without numbers is not rescanned either.
+    
+    Only numbers without an analysis row are built, so an interrupted build
+    resumes where it stopped. save_contacts drops the rows of contacts it
+    rewrites, and the final check runs under the write lock, so numbers
+    changed during the build are picked up by another pass before the
+    regions are marked built.
+    
+    Args:
+        user_email: Email of the authenticated user
+        regions: ISO region code or list of codes
+        parallel: Let analysis use the process pool (sync jobs only; request
+            paths analyze in-process)
+    """
+    if isinstance(regions, str):
+        regions = [regions]
+    conn = get_db_connection()
+    # One primary-key lookup (cheap enough for every page of a listing)
+    indexed = set(_get_indexed_regions(conn, user_email))
+    missing = [region for region in regions if region not in indexed]
+    if not missing:
+        return
+    
+    # Analyze in bounded batches so a large book is never fully in memory
+    total = 0
+    after = None
+    while True:
+        batch = _phones_missing_analysis(conn, user_email, missing, after, config.ANALYSIS_BATCH_SIZE)
+        if batch:
+            _write_missing_analysis(conn, user_email, batch, missing, parallel)
+            total += len(batch)
+            after = (batch[-1]['resource_name'], batch[-1]['position'])
+            continue
+        
+        # End of a pass: mark the regions built unless a write slipped in meanwhile
+        conn.execute('BEGIN IMMEDIATE')
+        if not _phones_missing_analysis(conn, user_email, missing, limit=1):
+            _mark_regions_analyzed(conn, user_email, missing)
+            conn.commit()
+            break
+        conn.rollback()
+        after = None
+    logger.info(f"Built phone analysis index for {user_email}, regions {missing} ({total} numbers)")
+
+def count_phone_fixes_by_region(user_email: str, regions) -> dict:
+    """
+    Number of contacts with a number needing a fix per region, counted
+    from the index alone. Call ensure_phone_analysis first.
+    
+    Returns:
+        Dict of region -> count (regions without fixes are omitted)
+    """
+    conn = get_db_connection()
+    placeholders = ','.join('?' * len(regions))
+    rows = conn.execute(f'''
+        SELECT region, COUNT(DISTINCT resource_name) AS count FROM phone_analysis
+        WHERE user_email = ? AND needs_fix = 1 AND region IN ({placeholders})
+        GROUP BY region
+    ''', (user_email, *regions)).fetchall()
+    return {row['region']: row['count'] for row in rows}
+
+def iter_phone_fixes(user_email: str, region: str, exclude_staged: bool = False,
+                     after: str = None, limit: int = None):
+    """
+    Contacts with a number that needs a fix for a region, read from the
+    analysis index, ordered by resource_name. Staging holds one change per
+    contact, so each contact is listed once, with its first number that
+    needs a fix. Call ensure_phone_analysis first.
+    
+    Args:
+        user_email: Email of the authenticated user
+        region: ISO region code the index was built for
+        exclude_staged: Skip contacts that already have a staged change
+        after: Keyset cursor; only contacts with a greater resource_name
+        limit: Maximum number of contacts
+    
+    Yields:
+        Contact dicts (decrypted, in fetchmany batches) where phone_number is
+        the number to fix, plus a 'suggested' E.164 field
+    """
+    conn = get_db_connection()
+    filters = ''
+    params = [user_email, region]
+    if exclude_staged:
+        filters += '''
+          AND NOT EXISTS (
+              SELECT 1 FROM staged_changes s
+              WHERE s.user_email = a.user_email AND s.resource_name = a.resource_name
+          )'''
+    if after is not None:
+        filters += ' AND a.resource_name > ?'
+        params.append(after)
+    suffix = ''
+    if limit is not None:
+        suffix = ' LIMIT ?'
+        params.append(limit)
+    
+    cursor = conn.execute(f'''
+        SELECT c.resource_name, c.given_name, p.value AS phone_number, c.update_time, a.suggested
+        FROM phone_analysis a
+        JOIN contact_phones p ON p.user_email = a.user_email
+            AND p.resource_name = a.resource_name AND p.position = a.position
+        JOIN contacts c ON c.user_email = a.user_email AND c.resource_name = a.resource_name
+        WHERE a.user_email = ? AND a.region = ? AND a.needs_fix = 1
+          AND a.position = (
+              SELECT MIN(first.position) FROM phone_analysis first
+              WHERE first.user_email = a.user_email AND first.region = a.region
+                AND first.resource_name = a.resource_name AND first.needs_fix = 1
+          ){filters}
+        ORDER BY a.resource_name{suffix}
+    ''', params)
+    
+    for row in _iter_rows(cursor):
+        contact = dict(row)
+        contact['phone_number'] = FieldEncryption.decrypt(contact['phone_number'])
+        contact['suggested'] = FieldEncryption.decrypt(contact['suggested'])
+        yield contact
+
+# ============= DATA VERSION FUNCTIONS =============
+
+def get_data_version(user_email: str) -> int:
+    """
+    Current data version of a user (0 before the first write).
+    
+    PERF: A single primary-key lookup, so read endpoints can answer
+    If-None-Match without reading any contact data.
+    """
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT version FROM user_data_version WHERE user_email = ?',
+        (user_email,)
+    ).fetchone()
+    return row['version'] if row else 0
+
+def _bump_data_version(conn, user_email: str):
+    """Increment a user's data version in the caller's transaction (caller commits)."""
+    conn.execute('''
+        INSERT INTO user_data_version (user_email, version, updated_at)
+        VALUES (?, 1, ?)
+        ON CONFLICT(user_email) DO UPDATE SET
+            version=version + 1,
+            updated_at=excluded.updated_at
+    ''', (user_email, datetime.now().isoformat()))
+
+# ============= SYNC STATE FUNCTIONS =============
+
+def get_sync_token(user_email: str):
+    """Get the stored People API sync token for a user, or None."""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT sync_token FROM sync_state WHERE user_email = ?',
+        (user_email,)
+    ).fetchone()
+    return row['sync_token'] if row else None
+
+def save_sync_token(user_email: str, sync_token: str):
+    """Store the nextSyncToken returned by the last completed sync."""
+    conn = get_db_connection()
+    conn.execute('''
+        INSERT INTO sync_state (user_email, sync_token, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_email) DO UPDATE SET
+            sync_token=excluded.sync_token,
+            updated_at=excluded.updated_at
+    ''', (user_email, sync_token, datetime.now().isoformat()))
+    conn.commit()
+
+def clear_sync_token(user_email: str):
+    """Forget a user's sync token so the next sync is a full resync."""
+    conn = get_db_connection()
+    conn.execute('DELETE FROM sync_state WHERE user_email = ?', (user_email,))
+    conn.commit()
+
+# ============= USER CREDENTIALS FUNCTIONS =============
+
+def save_user_credentials(user_email: str, credentials_json: str):
+    """
+    Store a user's Google OAuth credentials, encrypted at rest.
+    
+    Args:
+        user_email: Email of the authenticated user
+        credentials_json: Authorized-user JSON (Credentials.to_json())
+    """
+    conn = get_db_connection()
+    conn.execute('''
+        INSERT INTO user_credentials (user_email, credentials, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_email) DO UPDATE SET
+            credentials=excluded.credentials,
+            updated_at=excluded.updated_at
+    ''', (user_email, FieldEncryption.encrypt(credentials_json), datetime.now().isoformat()))
+    conn.commit()
+
+def get_user_credentials(user_email: str):
+    """Get a user's decrypted authorized-user JSON, or None if not stored."""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT credentials FROM user_credentials WHERE user_email = ?',
+        (user_email,)
+    ).fetchone()
+    if not row or not row['credentials']:
+        return None
+    return FieldEncryption.decrypt(row['credentials']) or None
+
+# ============= SYNC JOB FUNCTIONS =============
+
+SYNC_JOB_ACTIVE_STATUSES = ('queued', 'running')
+
+def create_sync_job(job_id: str, user_email: str, max_active: int, stale_before: str) -> bool:
+    """
+    Create a queued sync job unless the user already has max_active jobs in flight.
+    The check and insert run as one statement so concurrent workers cannot overshoot.
+    
+    Args:
+        job_id: New job identifier
+        user_email: Email of the authenticated user
+        max_active: Maximum number of queued/running jobs allowed per user
+        stale_before: ISO timestamp; active jobs not updated since then are ignored
+        
+    Returns:
+        True if the job was created, False if the user is at the limit
+    """
+    conn = get_db_connection()
+    now = datetime.now().isoformat()
+    cursor = conn.execute('''
+        INSERT INTO sync_jobs (job_id, user_email, status, created_at, updated_at)
+        SELECT ?, ?, 'queued', ?, ?
+        WHERE (
+            SELECT COUNT(*) FROM sync_jobs
+            WHERE user_email = ? AND status IN (?, ?) AND updated_at >= ?
+        ) < ?
+    ''', (job_id, user_email, now, now, user_email, *SYNC_JOB_ACTIVE_STATUSES, stale_before, max_active))
+    conn.commit()
+    return cursor.rowcount == 1
+
+def update_sync_job(job_id: str, **fields):
+    """Update progress/status columns of a sync job and bump its heartbeat."""
+    fields['updated_at'] = datetime.now().isoformat()
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    conn = get_db_connection()
+    conn.execute(
+        f'UPDATE sync_jobs SET {assignments} WHERE job_id = ?',
+        (*fields.values(), job_id)
+    )
+    conn.commit()
+
+def touch_sync_jobs(job_ids):
+    """Bump the heartbeat of jobs that are alive but not reporting progress (queued)."""
+    if not job_ids:
+        return
+    now = datetime.now().isoformat()
+    conn = get_db_connection()
+    conn.executemany(
+        "UPDATE sync_jobs SET updated_at = ? WHERE job_id = ? AND status = 'queued'",
+        [(now, job_id) for job_id in job_ids]
+    )
+    conn.commit()
+
+def fail_stale_sync_job(job_id: str, stale_before: str, error: str) -> bool:
+    """
+    Mark an active job failed if its heartbeat is older than stale_before.
+    
+    Returns:
+        True if the job was moved to failed
+    """
+    conn = get_db_connection()
+    now = datetime.now().isoformat()
+    cursor = conn.execute('''
+        UPDATE sync_jobs SET status = 'failed', error = ?, finished_at = ?, updated_at = ?
+        WHERE job_id = ? AND status IN (?, ?) AND updated_at < ?
+    ''', (error, now, now, job_id, *SYNC_JOB_ACTIVE_STATUSES, stale_before))
+    conn.commit()
+    return cursor.rowcount == 1
+
+def get_sync_job(job_id: str, user_email: str):
+    """Get a sync job owned by a specific user, or None."""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT * FROM sync_jobs WHERE job_id = ? AND user_email = ?',
+        (job_id, user_email)
+    ).fetchone()
+    return dict(row) if row else None
+
+# ============= PUSH PROGRESS FUNCTIONS =============
+
+# Throughput stats reported by push_service.push_staged_changes
+PUSH_STATS_FIELDS = ('contacts_total', 'contacts_done', 'requests', 'elapsed_seconds', 'contacts_per_second')
+
+def start_push_progress(user_email: str):
+    """Reset a user's push progress for a new push (status running, counters zero)."""
+    conn = get_db_connection()
+    now = datetime.now().isoformat()
+    conn.execute('''
+        INSERT OR REPLACE INTO push_progress (user_email, status, started_at, updated_at)
+        VALUES (?, 'running', ?, ?)
+    ''', (user_email, now, now))
+    conn.commit()
+
+def update_push_progress(user_email: str, stats: dict = None, status: str = None):
+    """
+    Record the latest throughput stats and/or status of a user's push.
+    
+    Args:
+        user_email: Email of the authenticated user
+        stats: Stats dict from push_staged_changes (see PUSH_STATS_FIELDS)
+        status: New status ('completed' or 'failed'); None keeps it
+    """
+    fields = {field: stats[field] for field in PUSH_STATS_FIELDS} if stats else {}
+    if status:
+        fields['status'] = status
+    fields['updated_at'] = datetime.now().isoformat()
+    assignments = ', '.join(f"{column} = ?" for column in fields)
+    conn = get_db_connection()
+    conn.execute(
+        f'UPDATE push_progress SET {assignments} WHERE user_email = ?',
+        (*fields.values(), user_email)
+    )
+    conn.commit()
+
+def get_push_progress(user_email: str):
+    """Progress of a user's latest push, or None if the user never pushed."""
+    conn = get_db_connection()
+    row = conn.execute(
+        'SELECT * FROM push_progress WHERE user_email = ?',
+        (user_email,)
+    ).fetchone()
+    return dict(row) if row else None
+
 # ============= STAGED CHANGES FUNCTIONS =============
 
 def stage_change(resource_name: str, contact_name: str, original_phone: str, new_phone: str, action: str, user_email: str, new_name: str = None):
@@ -217,19 +1226,40 @@ def stage_change(resource_name: str, contact_name: str, original_phone: str, new
             (resource_name, user_email, contact_name, original_phone, new_phone, action, created_at, new_name)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (resource_name, user_email, contact_name, original_phone, new_phone, action, now, new_name))
-        
+    
+    _bump_data_version(conn, user_email)
     conn.commit()
-    conn.close()
+
+def iter_staged_changes(user_email: str, batch_size: int = None,
+                        after=None, limit: int = None):
+    """
+    Stream a user's staged changes, newest first (ties broken by id), in
+    fetchmany batches.
+    
+    Args:
+        user_email: Email of the authenticated user
+        batch_size: Rows per fetchmany (default DB_FETCH_BATCH_SIZE)
+        after: Keyset cursor (created_at, id) of the last change already seen
+        limit: Maximum number of changes
+    """
+    conn = get_db_connection()
+    query = 'SELECT * FROM staged_changes WHERE user_email = ?'
+    params = [user_email]
+    if after is not None:
+        created_at, change_id = after
+        query += ' AND (created_at < ? OR (created_at = ? AND id < ?))'
+        params.extend([created_at, created_at, change_id])
+    query += ' ORDER BY created_at DESC, id DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    cursor = conn.execute(query, params)
+    for row in _iter_rows(cursor, batch_size):
+        yield dict(row)
 
 def get_staged_changes(user_email: str):
     """Get all staged changes for a specific user."""
-    conn = get_db_connection()
-    changes = conn.execute(
-        'SELECT * FROM staged_changes WHERE user_email = ? ORDER BY created_at DESC',
-        (user_email,)
-    ).fetchall()
-    conn.close()
-    return [dict(row) for row in changes]
+    return list(iter_staged_changes(user_email))
 
 def get_staged_changes_summary(user_email: str):
     """Get summary counts of staged changes for a specific user."""
@@ -254,7 +1284,6 @@ def get_staged_changes_summary(user_email: str):
             summary['rejects'] = count
         elif action == 'edit':
             summary['edits'] = count
-    conn.close()
     return summary
 
 def remove_staged_change(resource_name: str, user_email: str):
@@ -264,15 +1293,25 @@ def remove_staged_change(resource_name: str, user_email: str):
         'DELETE FROM staged_changes WHERE resource_name = ? AND user_email = ?', 
         (resource_name, user_email)
     )
+    _bump_data_version(conn, user_email)
+    conn.commit()
+
+def remove_staged_changes(resource_names, user_email: str):
+    """Remove several staged changes for a user (e.g. the ones pushed successfully)."""
+    conn = get_db_connection()
+    conn.executemany(
+        'DELETE FROM staged_changes WHERE resource_name = ? AND user_email = ?',
+        [(resource_name, user_email) for resource_name in resource_names]
+    )
+    _bump_data_version(conn, user_email)
     conn.commit()
-    conn.close()
 
 def clear_all_staged_changes(user_email: str):
     """Clear all staged changes for a specific user."""
     conn = get_db_connection()
     conn.execute('DELETE FROM staged_changes WHERE user_email = ?', (user_email,))
+    _bump_data_version(conn, user_email)
     conn.commit()
-    conn.close()
 
 def is_contact_staged(resource_name: str, user_email: str) -> bool:
     """Check if a contact is already staged for a user."""
@@ -281,7 +1320,6 @@ def is_contact_staged(resource_name: str, user_email: str) -> bool:
         'SELECT 1 FROM staged_changes WHERE resource_name = ? AND user_email = ?', 
         (resource_name, user_email)
     ).fetchone()
-    conn.close()
     return row is not None
 
 def get_all_staged_resource_names(user_email: str) -> set:
@@ -300,7 +1338,6 @@ def get_all_staged_resource_names(user_email: str) -> set:
         'SELECT resource_name FROM staged_changes WHERE user_email = ?',
         (user_email,)
     ).fetchall()
-    conn.close()
     return {row['resource_name'] for row in rows}
 
 # Initialize on module load
@@ -0,0 +1,488 @@
+"""
+Phone Service
+Pure phone-number logic: country detection, parsing/validation to E.164,
+and the per-number analysis stored in the phone_analysis index.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import phonenumbers
+from phonenumbers.phonemetadata import PhoneMetadata
+
+from backend.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Lazily created on the first book above PHONE_ANALYSIS_PARALLEL_THRESHOLD
+_POOL_WORKERS = config.PHONE_ANALYSIS_WORKERS or os.cpu_count() or 1
+_pool = None
+_pool_lock = threading.Lock()
+
+def detect_country_code(phone: str) -> str:
+    """
+    Intelligently detects the country code for a phone number.
+    
+    Detection Strategy:
+    1. If number already has country code (starts with +), extract region
+    2. Find the first common region the number is valid in: plain digit
+       strings go through the precompiled RegionClassifier, anything it
+       cannot decide is trial-parsed per region
+    3. Use number length and pattern matching as hints
+    4. Default to US if ambiguous (most common international format)
+    
+    Returns the detected region code (e.g., "US", "IN", "GB")
+    
+    PERF: Memoized on the raw string (see cache_stats).
+    """
+    return _detect_country_code_cached(phone)
+
+@lru_cache(maxsize=config.PHONE_CACHE_SIZE)
+def _detect_country_code_cached(phone: str) -> str:
+    return _detect_country_code(phone)
+
+def _detect_country_code(phone: str, use_classifier: bool = True) -> str:
+    """
+    Uncached detection. use_classifier=False forces the original trial
+    parsing for every number (reference for scripts/check_country_detection.py).
+    """
+    # Clean the number for analysis
+    clean_phone = phone.strip().replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    
+    # If already has country code, try to detect it
+    if clean_phone.startswith('+'):
+        try:
+            parsed = phonenumbers.parse(clean_phone, None)
+            region = phonenumbers.region_code_for_number(parsed)
+            if region:
+                return region
+        except:
+            pass
+    
+    region = RegionClassifier.AMBIGUOUS
+    if use_classifier and clean_phone.isascii() and clean_phone.isdigit():
+        region = _classifier.classify(clean_phone)
+    if region is RegionClassifier.AMBIGUOUS:
+        region = _detect_country_code_by_trial_parse(clean_phone)
+    if region:
+        return region
+    
+    # Fallback: Use number length heuristics
+    digits_only = ''.join(filter(str.isdigit, clean_phone))
+    
+    # 10 digits without country code - could be US or IN
+    if len(digits_only) == 10:
+        # Check for US-style area codes (first digit 2-9)
+        if digits_only[0] in '23456789':
+            return "US"
+        # Indian mobile numbers typically start with 6, 7, 8, or 9
+        if digits_only[0] in '6789':
+            return "IN"
+    
+    # 11 digits starting with 1 - likely US/Canada
+    if len(digits_only) == 11 and digits_only.startswith('1'):
+        return "US"
+    
+    # 12+ digits starting with 91 - likely India
+    if len(digits_only) >= 12 and digits_only.startswith('91'):
+        return "IN"
+    
+    # Default to US as it's the most common international format
+    return "US"
+
+def _detect_country_code_by_trial_parse(clean_phone: str):
+    """First detection region the number parses as valid in, or None."""
+    for region in DETECTION_REGIONS:
+        try:
+            parsed = phonenumbers.parse(clean_phone, region)
+            if phonenumbers.is_valid_number(parsed):
+                return region
+        except:
+            continue
+    return None
+
+class RegionClassifier:
+    """
+    Resolves which detection region a digits-only number is valid in
+    without calling phonenumbers.parse.
+    
+    Built once from phonenumbers metadata:
+    - a digit-prefix trie of everything parse() might strip or reinterpret
+      for one of the regions (country codes, national prefixes), backed by the
+      compiled IDD and national-prefix-for-parsing patterns;
+    - national number length tables per country code.
+    
+    A number that touches any of those prefixes is reported as AMBIGUOUS and
+    the caller falls back to trial parsing. Otherwise parse() would use the
+    digits unchanged as the national number, so validating
+    PhoneNumber(country_code, digits) for the regions whose length table
+    fits gives the same answer without the exceptions.
+    """
+    AMBIGUOUS = object()
+    
+    def __init__(self, regions):
+        self._trie = {}
+        self._start_patterns = []
+        self._candidates = []
+        
+        for region in regions:
+            metadata = PhoneMetadata.metadata_for_region(region)
+            country_code = metadata.country_code
+            
+            self._add_prefix(str(country_code))
+            if metadata.national_prefix:
+                self._add_prefix(metadata.national_prefix)
+            for pattern in (metadata.international_prefix, metadata.national_prefix_for_parsing):
+                if pattern:
+                    self._start_patterns.append(re.compile(pattern))
+            
+            # is_valid_number checks against whichever region of the country
+            # code the number belongs to (e.g. CA under +1), so use the union
+            lengths = set()
+            for region_code in phonenumbers.region_codes_for_country_code(country_code):
+                region_metadata = PhoneMetadata.metadata_for_region(region_code)
+                if region_metadata and region_metadata.general_desc:
+                    lengths.update(region_metadata.general_desc.possible_length or ())
+            self._candidates.append((region, country_code, frozenset(lengths) or None))
+    
+    def _add_prefix(self, prefix: str):
+        node = self._trie
+        for digit in prefix:
+            node = node.setdefault(digit, {})
+        node[None] = True
+    
+    def _has_known_prefix(self, digits: str) -> bool:
+        node = self._trie
+        for digit in digits:
+            node = node.get(digit)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+    
+    def classify(self, digits: str):
+        """
+        Args:
+            digits: ASCII digits only
+            
+        Returns:
+            Region code, None if valid in no region, or AMBIGUOUS
+        """
+        if not MIN_NATIONAL_LENGTH <= len(digits) <= MAX_NATIONAL_LENGTH:
+            return self.AMBIGUOUS
+        if self._has_known_prefix(digits) or any(p.match(digits) for p in self._start_patterns):
+            return self.AMBIGUOUS
+        
+        national_number = int(digits)
+        for region, country_code, lengths in self._candidates:
+            if lengths is not None and len(digits) not in lengths:
+                continue
+            number = phonenumbers.PhoneNumber(country_code=country_code, national_number=national_number)
+            if phonenumbers.is_valid_number(number):
+                return region
+        return None
+
+# Regions tried, in order, for numbers without a country code
+DETECTION_REGIONS = ("US", "IN", "GB", "AU", "DE")
+
+# phonenumbers rejects national numbers outside these lengths
+MIN_NATIONAL_LENGTH = 2
+MAX_NATIONAL_LENGTH = 17
+
+_classifier = RegionClassifier(DETECTION_REGIONS)
+
+def parse_and_validate(phone: str, default_region: str = None):
+    """
+    Parses a phone number and returns the E.164 format if valid.
+    If no default_region is provided, intelligently detects the country.
+    Returns None if invalid.
+    """
+    if default_region is None:
+        default_region = detect_country_code(phone)
+    
+    return _parse_e164(phone, default_region)[0]
+
+@lru_cache(maxsize=config.PHONE_CACHE_SIZE)
+def _parse_e164(phone: str, region: str):
+    """
+    Parses and validates a number once per (raw number, region).
+    
+    PERF: The same raw strings come back on every analysis, region and
+    resync, so results are memoized in a bounded LRU (see cache_stats).
+    
+    Returns:
+        Tuple of (E.164 string, region of the number), or (None, None) if invalid
+    """
+    try:
+        parsed = phonenumbers.parse(phone, region)
+    except phonenumbers.NumberParseException:
+        return None, None
+    if not phonenumbers.is_valid_number(parsed):
+        return None, None
+    return (
+        phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
+        phonenumbers.region_code_for_number(parsed)
+    )
+
+def cache_stats() -> dict:
+    """Hit/miss counters and sizes of the normalization caches."""
+    stats = {}
+    for name, cached in (("parse", _parse_e164), ("detect", _detect_country_code_cached)):
+        info = cached.cache_info()
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        }
+    return stats
+
+def clear_caches():
+    """Empties the normalization caches and resets their counters."""
+    _parse_e164.cache_clear()
+    _detect_country_code_cached.cache_clear()
+
+def strip_formatting(phone: str) -> str:
+    """Number without spaces and dashes, as compared against its E.164 form."""
+    return phone.replace(" ", "").replace("-", "")
+
+def analyze_phone(phone: str, region: str) -> dict:
+    """
+    Analyzes one number for one default region.
+    
+    A number needs a fix when it is valid but its raw string differs from
+    the E.164 form. This catches: 999... (missing +91), 099... (extra 0),
+    080... (landline)
+    
+    Args:
+        phone: Raw phone number (may be empty)
+        region: ISO country code used for numbers without a country prefix,
+                or None to detect the country per number
+        
+    Returns:
+        Dict with suggested (E.164 or None), needs_fix (bool) and
+        detected_region (region of the parsed number, or None)
+    """
+    result = {"suggested": None, "needs_fix": False, "detected_region": None}
+    if not phone:
+        return result
+    if region is None:
+        region = detect_country_code(phone)
+    
+    formatted, detected_region = _parse_e164(phone, region)
+    if not formatted:
+        return result
+    
+    result["suggested"] = formatted
+    result["needs_fix"] = strip_formatting(phone) != formatted
+    result["detected_region"] = detected_region
+    return result
+
+def analyze_phone_regions(phone: str, regions) -> dict:
+    """
+    Analyzes one number for several default regions in a single pass.
+    
+    The default region only matters for numbers without a country code, so
+    a number that already starts with '+' is parsed once and that result is
+    shared by every region.
+    
+    Args:
+        phone: Raw phone number (may be empty)
+        regions: ISO country codes to evaluate
+        
+    Returns:
+        Dict of region -> analyze_phone() result
+    """
+    if not regions:
+        return {}
+    if not phone or phone.lstrip().startswith('+'):
+        analysis = analyze_phone(phone, regions[0])
+        return {region: analysis for region in regions}
+    return {region: analyze_phone(phone, region) for region in regions}
+
+# Buckets of the batch pre-filter (see classify_numbers)
+CANONICAL = "canonical"
+GARBAGE = "garbage"
+NEEDS_PARSE = "needs_parse"
+
+# Analysis result for garbage and invalid numbers (nothing to suggest)
+_UNCHANGED = {"suggested": None, "needs_fix": False, "detected_region": None}
+
+def _build_canonical_pattern():
+    """
+    '+' followed by a country code and ASCII digits, where the digits after
+    the country code do not start with anything parse() would strip as a
+    national prefix (e.g. +44 0...). Country codes are prefix-free, so the
+    alternation picks exactly one. Named groups: country_code, national.
+    """
+    alternatives = []
+    for country_code, region_codes in sorted(phonenumbers.COUNTRY_CODE_TO_REGION_CODE.items()):
+        metadata = PhoneMetadata.metadata_for_region_or_calling_code(country_code, region_codes[0])
+        national_prefix = metadata.national_prefix_for_parsing if metadata else None
+        if national_prefix:
+            alternatives.append(f"{country_code}(?!{national_prefix})")
+        else:
+            alternatives.append(str(country_code))
+    return re.compile(r"\+(?P<country_code>" + "|".join(alternatives) + r")(?P<national>[0-9]+)")
+
+_CANONICAL_PATTERN = _build_canonical_pattern()
+# One line per number (formatting already stripped): canonical, garbage
+# (phonenumbers needs at least two digits of any script), or anything else
+_CLASSIFY_PATTERN = re.compile(
+    rf"^(?:(?P<canonical>{_CANONICAL_PATTERN.pattern})"
+    rf"|(?P<garbage>[^\d\n]*(?:\d[^\d\n]*){{0,{MIN_NATIONAL_LENGTH - 1}}})"
+    r"|.*)$",
+    re.MULTILINE
+)
+
+def classify_numbers(phones) -> list:
+    """
+    Sorts a column of raw numbers into pre-filter buckets in one pass,
+    without calling phonenumbers.
+    
+    - CANONICAL: '+<country code><digits>' (spaces and dashes allowed, as
+      the fix check ignores them) with nothing parse() would rewrite, so the
+      E.164 form can only be the number itself and it never needs a fix,
+      whatever the default region
+    - GARBAGE: empty or fewer than two digits, which parse() rejects
+    - NEEDS_PARSE: everything else
+    
+    PERF: The column is joined into one newline-separated block, stripped
+    of formatting with two str.replace calls, and classified by a single
+    finditer of one combined pattern (one match per line), so the regex
+    engine does the work instead of a Python loop per number.
+    
+    Returns:
+        List of bucket names aligned with phones
+    """
+    phones = [phone or "" for phone in phones]
+    if not phones:
+        return []
+    block = "\n".join(phones)
+    if block.count("\n") != len(phones) - 1:
+        # A number containing a newline would span two lines; NUL is neither
+        # a digit nor stripped, so it keeps the number out of CANONICAL
+        block = "\n".join(phone.replace("\n", "\0") for phone in phones)
+    block = strip_formatting(block)
+    
+    return [
+        CANONICAL if match.start('canonical') != -1
+        else GARBAGE if match.start('garbage') != -1
+        else NEEDS_PARSE
+        for match in _CLASSIFY_PATTERN.finditer(block)
+    ]
+
+def _analyze_canonical(phone: str) -> dict:
+    """
+    Analysis of a CANONICAL number without phonenumbers.parse.
+    
+    The pre-filter guarantees parse() would keep the digits after the
+    country code as the national number, so the PhoneNumber is built
+    directly (leading zeros flagged as parse() does) and only validated.
+    Valid numbers are their own E.164 form: never a fix, but the suggestion
+    and detected region are kept like for parsed numbers.
+    """
+    e164 = strip_formatting(phone)
+    match = _CANONICAL_PATTERN.fullmatch(e164)
+    if not match:
+        return _UNCHANGED
+    country_code, national = match.group('country_code', 'national')
+    number = phonenumbers.PhoneNumber(country_code=int(country_code), national_number=int(national))
+    if len(national) > 1 and national.startswith('0'):
+        number.italian_leading_zero = True
+        leading_zeros = len(national) - len(national.lstrip('0'))
+        # An all-zero national number keeps its last zero as the number itself
+        number.number_of_leading_zeros = min(leading_zeros, len(national) - 1)
+    if not phonenumbers.is_valid_number(number):
+        return _UNCHANGED
+    return {
+        "suggested": e164,
+        "needs_fix": False,
+        "detected_region": phonenumbers.region_code_for_number(number)
+    }
+
+def _analyze_chunk(phones, regions):
+    """Process-pool worker: analyze_phone_regions for a slice of numbers."""
+    return [analyze_phone_regions(phone, regions) for phone in phones]
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the parent holds threads, locks and SQLite connections
+            _pool = ProcessPoolExecutor(
+                max_workers=_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def analyze_batch(phones, regions, parallel: bool = False) -> list:
+    """
+    Analyzes many numbers for several default regions.
+    
+    PERF: classify_numbers first settles canonical E.164 strings and
+    garbage without parsing. Neither ever needs a fix. Canonical numbers
+    are only validated (see _analyze_canonical) to keep their suggestion
+    and detected region, once for all regions. Only the remaining numbers
+    are parsed.
+    Parsing is pure Python and CPU-bound, so with parallel=True and at
+    least PHONE_ANALYSIS_PARALLEL_THRESHOLD numbers to parse they are split
+    into chunks across a process pool and scale with the number of cores.
+    Smaller batches run inline, where process start-up and pickling would
+    cost more than they save.
+    
+    Only background sync jobs pass parallel=True: a request thread must
+    never wait on the pool (or on its process start-up).
+    
+    Args:
+        phones: List of raw phone numbers (entries may be None)
+        regions: ISO country codes to evaluate ([None] detects per number)
+        parallel: Allow the process pool for large batches
+        
+    Returns:
+        List aligned with phones of analyze_phone_regions() results
+    """
+    phones = list(phones)
+    unchanged = {region: _UNCHANGED for region in regions}
+    results = [unchanged] * len(phones)
+    
+    buckets = classify_numbers(phones)
+    for i, bucket in enumerate(buckets):
+        if bucket == CANONICAL:
+            analysis = _analyze_canonical(phones[i])
+            results[i] = {region: analysis for region in regions}
+    
+    to_parse = [i for i, bucket in enumerate(buckets) if bucket == NEEDS_PARSE]
+    to_parse_phones = [phones[i] for i in to_parse]
+    
+    if not parallel or len(to_parse_phones) < config.PHONE_ANALYSIS_PARALLEL_THRESHOLD:
+        parsed = _analyze_chunk(to_parse_phones, regions)
+    else:
+        pool = _get_pool()
+        # A few chunks per worker keeps cores busy when some chunks parse slower
+        chunk_count = _POOL_WORKERS * 4
+        chunk_size = max(1, math.ceil(len(to_parse_phones) / chunk_count))
+        chunks = [to_parse_phones[i:i + chunk_size] for i in range(0, len(to_parse_phones), chunk_size)]
+        logger.info(f"Analyzing {len(to_parse_phones)} of {len(phones)} numbers in {len(chunks)} chunks across {_POOL_WORKERS} processes")
+        
+        parsed = []
+        for chunk_result in pool.map(_analyze_chunk, chunks, [regions] * len(chunks)):
+            parsed.extend(chunk_result)
+    
+    for i, analysis in zip(to_parse, parsed):
+        results[i] = analysis
+    return results
+
+def shutdown_analysis_pool():
+    """Stops the analysis process pool, if one was started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,390 @@
+"""
+Push Service
+Applies staged contact fixes to Google using the People API batch endpoints.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from googleapiclient.errors import HttpError
+from backend.core.config import config
+from backend.core.throttle import TokenBucket, execute_with_backoff
+from backend.services.auth_service import get_authenticated_service
+from backend.services import db_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Write quota is per user, so every push of a user shares one bucket
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+# people:batchUpdateContacts and people:getBatchGet accept at most 200 contacts
+BATCH_UPDATE_MAX = 200
+PUSH_READ_MASK = 'names,phoneNumbers,metadata'
+
+# google.rpc status of a stale etag (as text in HttpError bodies, as a code per contact)
+FAILED_PRECONDITION = 'FAILED_PRECONDITION'
+FAILED_PRECONDITION_CODE = 9
+
+
+def push_staged_changes(user_email: str, changes, service_factory=None, progress_callback=None, workers: int = None):
+    """
+    Push accepted/edited staged changes to Google in batches.
+    
+    Changes are grouped by the fields they update (a batch shares one
+    updateMask) and sent in chunks of up to 200 contacts with one
+    batchUpdateContacts per chunk, using the etags stored at sync time.
+    Only contacts Google rejects as stale are refetched (one getBatchGet)
+    and retried.
+    
+    Chunks run concurrently on a small worker pool. Writes are paced by a
+    per-user token bucket matched to the Google write quota, and 429/503
+    answers are retried with exponential backoff and jitter.
+    
+    Args:
+        user_email: Email of the authenticated user
+        changes: Staged change rows (from db_service.get_staged_changes)
+        service_factory: Callable returning a People API service; called once per
+            worker thread (defaults to the user's authenticated client)
+        progress_callback: Optional callable receiving throughput stats once the
+            chunks are planned and after each chunk
+        workers: Number of concurrent chunks (defaults to config.PUSH_WORKERS)
+        
+    Returns:
+        Dict with 'success' and 'skipped' lists of staged rows, a 'failed'
+        list of {"change": row, "error": str} and throughput 'stats'
+    """
+    results = {
+        "success": [],
+        "failed": [],
+        "skipped": []
+    }
+    started = time.monotonic()
+    
+    # Rejects are skipped (no action needed on Google)
+    to_push = []
+    for change in changes:
+        if change['action'] == 'reject':
+            results['skipped'].append(change)
+        else:
+            to_push.append(change)
+    
+    # PERF: Only etags and numbers are needed to build updates, so raw_json is never read
+    resource_names = [change['resource_name'] for change in to_push]
+    local_contacts = db_service.get_contacts_by_resource_names(
+        resource_names, user_email, fields=('resource_name', 'etag')
+    )
+    local_phones = db_service.get_contact_phones(resource_names, user_email)
+    for resource_name, contact in local_contacts.items():
+        contact['phone_numbers'] = local_phones.get(resource_name, [])
+    
+    # One updateMask per batch, so group changes by the fields they touch
+    groups = {}
+    for change in to_push:
+        if change['resource_name'] not in local_contacts:
+            results['failed'].append({"change": change, "error": "Contact not found in local DB"})
+            logger.warning(f"Contact not found for push: {change['resource_name']}")
+            continue
+        
+        update_fields = _update_fields(change)
+        if not update_fields:
+            results['success'].append(change)  # No changes needed
+            continue
+        groups.setdefault(','.join(update_fields), []).append(change)
+    
+    tasks = [
+        (update_mask, group[start:start + BATCH_UPDATE_MAX])
+        for update_mask, group in groups.items()
+        for start in range(0, len(group), BATCH_UPDATE_MAX)
+    ]
+    total = sum(len(chunk) for _, chunk in tasks)
+    stats = {"contacts_total": total, "contacts_done": 0, "requests": 0,
+             "elapsed_seconds": 0.0, "contacts_per_second": 0.0}
+    results['stats'] = stats
+    if progress_callback:
+        progress_callback(dict(stats))
+    
+    if not tasks:
+        return results
+    
+    if service_factory is None:
+        service_factory = lambda: get_authenticated_service(user_email)
+    bucket = _write_bucket(user_email)
+    thread_state = threading.local()
+    
+    def run(update_mask, chunk):
+        try:
+            # httplib2 transports are not thread-safe: one service per worker thread
+            if not hasattr(thread_state, 'service'):
+                thread_state.service = service_factory()
+            return _push_chunk(thread_state.service, bucket, user_email, update_mask, chunk, local_contacts)
+        except Exception as e:
+            # One broken chunk must not hide the chunks already written to Google
+            logger.error(f"Push chunk of {len(chunk)} contacts failed for {user_email}: {e}", exc_info=True)
+            return {
+                "success": [],
+                "failed": [{"change": change, "error": _error_message(e)} for change in chunk],
+                "contacts": len(chunk),
+                "requests": 0
+            }
+    
+    max_workers = max(1, min(workers or config.PUSH_WORKERS, len(tasks)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="push") as executor:
+        futures = [executor.submit(run, update_mask, chunk) for update_mask, chunk in tasks]
+        for future in as_completed(futures):
+            chunk_results = future.result()
+            for key in ('success', 'failed'):
+                results[key].extend(chunk_results[key])
+            
+            elapsed = time.monotonic() - started
+            stats['contacts_done'] += chunk_results['contacts']
+            stats['requests'] += chunk_results['requests']
+            stats['elapsed_seconds'] = round(elapsed, 3)
+            stats['contacts_per_second'] = round(stats['contacts_done'] / elapsed, 2) if elapsed else 0.0
+            logger.info(
+                f"Push progress for {user_email}: {stats['contacts_done']}/{total} contacts, "
+                f"{stats['requests']} requests, {stats['contacts_per_second']} contacts/s"
+            )
+            if progress_callback:
+                progress_callback(dict(stats))
+    
+    return results
+
+
+def _write_bucket(user_email: str) -> TokenBucket:
+    """Per-user token bucket shared by all pushes of that user in this process."""
+    with _buckets_lock:
+        bucket = _buckets.get(user_email)
+        if bucket is None:
+            bucket = TokenBucket(config.PUSH_WRITE_QUOTA_PER_MINUTE)
+            _buckets[user_email] = bucket
+        return bucket
+
+
+def _execute(request, bucket=None):
+    """Execute a People API request with the configured backoff policy."""
+    return execute_with_backoff(
+        request,
+        bucket=bucket,
+        max_retries=config.PUSH_MAX_RETRIES,
+        base_delay=config.PUSH_BACKOFF_BASE_SECONDS,
+        max_delay=config.PUSH_BACKOFF_MAX_SECONDS
+    )
+
+
+def _update_fields(change):
+    """People API fields a staged change updates."""
+    update_fields = []
+    if change.get('new_phone'):
+        update_fields.append('phoneNumbers')
+    if change.get('new_name'):
+        update_fields.append('names')
+    return update_fields
+
+
+def merge_phone_numbers(existing_phones, original_phone: str, new_phone: str):
+    """
+    Replace original_phone with new_phone inside a contact's phoneNumbers list,
+    keeping every other number and the entry's type.
+    
+    Args:
+        existing_phones: Current phoneNumbers list from Google (may be empty)
+        original_phone: The number the fix was computed from
+        new_phone: The corrected number
+        
+    Returns:
+        New phoneNumbers list for the update body
+    """
+    target = _digits(original_phone) if original_phone else None
+    merged = []
+    replaced = False
+    for entry in existing_phones or []:
+        value = entry.get('value')
+        if not replaced and target and (value == original_phone or _digits(value) == target):
+            merged.append(_phone_entry(entry, new_phone))
+            replaced = True
+        else:
+            merged.append(_phone_entry(entry, value))
+    
+    # Original number is gone on Google's side; add the fix without dropping the others
+    # (unless it is already there, e.g. a retry of a partly applied push)
+    new_digits = _digits(new_phone)
+    if not replaced and not any(_digits(entry['value']) == new_digits for entry in merged):
+        merged.insert(0, {"value": new_phone})
+    return merged
+
+
+def _phone_entry(entry, value: str):
+    """Copy of a phoneNumbers entry with a new value (output-only fields dropped)."""
+    phone = {"value": value}
+    if entry.get('type'):
+        phone["type"] = entry['type']
+    return phone
+
+
+def _digits(phone: str) -> str:
+    return ''.join(ch for ch in (phone or '') if ch.isdigit())
+
+
+def _build_person(change, etag: str, current_person):
+    """Build the updated person body for one staged change on top of the current person."""
+    person = {"etag": etag}
+    if change.get('new_phone'):
+        person["phoneNumbers"] = merge_phone_numbers(
+            current_person.get('phoneNumbers', []),
+            change.get('original_phone'),
+            change['new_phone']
+        )
+    if change.get('new_name'):
+        person["names"] = [{"givenName": change['new_name']}]
+    return person
+
+
+def _local_person(contact):
+    """Person as last synced (the parts updates build on), from contact_phones."""
+    return {"phoneNumbers": contact.get('phone_numbers', [])}
+
+
+def _error_message(error: Exception) -> str:
+    """Error text recorded for a failed change."""
+    if isinstance(error, HttpError):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
+
+def _is_conflict(status_code, rpc_status=None) -> bool:
+    """
+    Stale etags come back as 400 FAILED_PRECONDITION (409/412 on some paths).
+    Any other 400 (malformed body, bad updateMask) is a hard failure.
+    """
+    if status_code in (409, 412):
+        return True
+    return status_code == 400 and rpc_status in (FAILED_PRECONDITION, FAILED_PRECONDITION_CODE)
+
+
+def _http_error_status(error: HttpError):
+    """google.rpc status name from an HttpError body, or None."""
+    try:
+        return json.loads(error.content.decode('utf-8')).get('error', {}).get('status')
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+
+
+def _push_chunk(service, bucket, user_email: str, update_mask: str, chunk, local_contacts):
+    """
+    Push up to BATCH_UPDATE_MAX changes sharing one updateMask.
+    
+    Optimistic: the locally stored etag and person are used first. Only if
+    Google rejects them as stale are the conflicting contacts refetched with
+    one getBatchGet and retried once.
+    
+    Returns:
+        Dict with this chunk's 'success'/'failed' entries, the number of
+        contacts handled and the number of Google requests made
+    """
+    results = {"success": [], "failed": [], "contacts": len(chunk), "requests": 0}
+    by_resource = {change['resource_name']: change for change in chunk}
+    
+    contacts = {}
+    for resource_name, change in by_resource.items():
+        local = local_contacts[resource_name]
+        contacts[resource_name] = _build_person(change, local.get('etag'), _local_person(local))
+    
+    updated_people = []
+    conflicts = _send_batch(service, bucket, user_email, update_mask, contacts, by_resource, updated_people, results)
+    
+    if conflicts:
+        logger.info(f"Refetching {len(conflicts)} contacts with stale etags for {user_email}")
+        try:
+            retry = _refetch_people(service, conflicts, by_resource, results)
+        except Exception as e:
+            retry = {}
+            for resource_name in conflicts:
+                results['failed'].append({"change": by_resource[resource_name], "error": _error_message(e)})
+        if retry:
+            still_conflicting = _send_batch(service, bucket, user_email, update_mask, retry, by_resource, updated_people, results)
+            for resource_name, error in still_conflicting.items():
+                results['failed'].append({"change": by_resource[resource_name], "error": error})
+    
+    # [SYNC-CRITICAL] Immediately update local DB with new Etags
+    if updated_people:
+        db_service.save_contacts(updated_people, user_email)
+    
+    logger.info(f"Batch pushed {len(updated_people)}/{len(chunk)} contacts for {user_email} ({update_mask})")
+    return results
+
+
+def _send_batch(service, bucket, user_email: str, update_mask: str, contacts, by_resource, updated_people, results):
+    """
+    Send one batchUpdateContacts call.
+    
+    Successes are appended to updated_people/results, hard failures to results.
+    
+    Returns:
+        Dict of resource_name -> error for contacts rejected as stale
+    """
+    results['requests'] += 1
+    try:
+        response = _execute(service.people().batchUpdateContacts(body={
+            "contacts": contacts,
+            "updateMask": update_mask,
+            "readMask": PUSH_READ_MASK
+        }), bucket)
+    except HttpError as e:
+        if _is_conflict(e.resp.status, _http_error_status(e)):
+            # The whole batch is rejected; we cannot tell which etag was stale
+            return {resource_name: str(e) for resource_name in contacts}
+        for resource_name in contacts:
+            results['failed'].append({"change": by_resource[resource_name], "error": str(e)})
+        logger.error(f"Batch push of {len(contacts)} contacts failed for {user_email}: {e}")
+        return {}
+    except Exception as e:
+        # Timeouts and token refresh errors fail this batch only
+        for resource_name in contacts:
+            results['failed'].append({"change": by_resource[resource_name], "error": _error_message(e)})
+        logger.error(f"Batch push of {len(contacts)} contacts failed for {user_email}: {_error_message(e)}")
+        return {}
+    
+    conflicts = {}
+    update_result = response.get('updateResult', {})
+    for resource_name in contacts:
+        change = by_resource[resource_name]
+        person_response = update_result.get(resource_name, {})
+        person = person_response.get('person')
+        status_code = person_response.get('httpStatusCode', 200 if person else None)
+        if person and status_code == 200:
+            updated_people.append(person)
+            results['success'].append(change)
+            continue
+        
+        rpc_status = person_response.get('status', {})
+        error = rpc_status.get('message', 'No result returned by Google')
+        if _is_conflict(status_code, rpc_status.get('code')):
+            conflicts[resource_name] = error
+        else:
+            results['failed'].append({"change": change, "error": error})
+    return conflicts
+
+
+def _refetch_people(service, resource_names, by_resource, results):
+    """Fetch fresh etags/people with one getBatchGet and rebuild their update bodies."""
+    results['requests'] += 1
+    fetched = _execute(service.people().getBatchGet(
+        resourceNames=list(resource_names),
+        personFields='names,phoneNumbers'
+    ))
+    
+    contacts = {}
+    for response in fetched.get('responses', []):
+        resource_name = response.get('requestedResourceName')
+        change = by_resource.get(resource_name)
+        if change is None:
+            continue
+        person = response.get('person')
+        if not person:
+            error = response.get('status', {}).get('message', 'Contact not found on Google')
+            results['failed'].append({"change": change, "error": error})
+            continue
+        contacts[resource_name] = _build_person(change, person.get('etag'), person)
+    return contacts
@@ -0,0 +1,153 @@
+"""
+Background Sync Jobs
+Runs Google contact syncs on a bounded worker pool so requests return immediately.
+Job state lives in SQLite so any uvicorn worker can answer progress polls.
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+from backend.core.config import config
+from backend.services import contact_service, db_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bounded pool: at most SYNC_MAX_WORKERS syncs talk to Google at once per process
+_executor = ThreadPoolExecutor(
+    max_workers=config.SYNC_MAX_WORKERS,
+    thread_name_prefix="sync-job"
+)
+
+# Jobs submitted by this process that are still waiting for a worker.
+# They have no thread of their own, so running jobs heartbeat them on every page.
+_queued_jobs = set()
+_queued_lock = threading.Lock()
+
+
+class SyncJobLimitExceeded(Exception):
+    """Raised when a user already has the maximum number of active sync jobs."""
+
+
+def submit_sync_job(user_email: str, full_resync: bool = False, service=None) -> Dict[str, Any]:
+    """
+    Queue a contact sync for a user and return immediately.
+    
+    Args:
+        user_email: Email of the authenticated user
+        full_resync: Ignore the stored sync token and re-download everything
+        service: People API service to use (e.g. a fake in tests); defaults to the authenticated client
+        
+    Returns:
+        The queued job as a dict (see get_sync_job)
+        
+    Raises:
+        SyncJobLimitExceeded: If the user already has SYNC_MAX_JOBS_PER_USER jobs in flight
+    """
+    job_id = uuid.uuid4().hex
+    stale_before = _stale_before()
+    
+    created = db_service.create_sync_job(
+        job_id,
+        user_email,
+        max_active=config.SYNC_MAX_JOBS_PER_USER,
+        stale_before=stale_before
+    )
+    if not created:
+        raise SyncJobLimitExceeded(
+            f"User already has {config.SYNC_MAX_JOBS_PER_USER} sync job(s) in progress"
+        )
+    
+    with _queued_lock:
+        _queued_jobs.add(job_id)
+    _executor.submit(_run_sync_job, job_id, user_email, full_resync, service)
+    logger.info(f"Queued sync job {job_id} for {user_email}")
+    return get_sync_job(job_id, user_email)
+
+
+def get_sync_job(job_id: str, user_email: str) -> Optional[Dict[str, Any]]:
+    """
+    Get progress of a sync job owned by the user.
+    An active job without a heartbeat for SYNC_JOB_STALE_SECONDS (e.g. its
+    worker process died) is marked failed here, so pollers stop waiting.
+    
+    Returns:
+        Dict with job_id, status (queued|running|completed|failed), mode,
+        pages_fetched, rows_written, deleted_count, errors and timestamps,
+        or None if the job does not exist for this user
+    """
+    job = db_service.get_sync_job(job_id, user_email)
+    if not job:
+        return None
+    
+    # Plain read first; only a job that really is stale costs a write
+    stale_before = _stale_before()
+    if job['status'] in db_service.SYNC_JOB_ACTIVE_STATUSES and (job['updated_at'] or '') < stale_before:
+        error = f"Sync job stopped responding (no progress for {config.SYNC_JOB_STALE_SECONDS}s)"
+        if db_service.fail_stale_sync_job(job_id, stale_before, error):
+            logger.warning(f"Sync job {job_id} for {user_email} marked failed: no heartbeat")
+            job = db_service.get_sync_job(job_id, user_email)
+    
+    return {
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "mode": job['mode'],
+        "pages_fetched": job['pages_fetched'] or 0,
+        "rows_written": job['rows_written'] or 0,
+        "deleted_count": job['deleted_count'] or 0,
+        "errors": [job['error']] if job['error'] else [],
+        "created_at": job['created_at'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at']
+    }
+
+
+def _stale_before() -> str:
+    """ISO timestamp before which an active job's heartbeat counts as stale."""
+    return (datetime.now() - timedelta(seconds=config.SYNC_JOB_STALE_SECONDS)).isoformat()
+
+
+def _run_sync_job(job_id: str, user_email: str, full_resync: bool, service):
+    """Worker body: runs the sync and records progress after every page."""
+    with _queued_lock:
+        _queued_jobs.discard(job_id)
+    db_service.update_sync_job(job_id, status='running', started_at=datetime.now().isoformat())
+    
+    def on_page(progress):
+        with _queued_lock:
+            waiting = list(_queued_jobs)
+        db_service.touch_sync_jobs(waiting)
+        db_service.update_sync_job(
+            job_id,
+            mode=progress['mode'],
+            pages_fetched=progress['pages_fetched'],
+            rows_written=progress['synced_count'],
+            deleted_count=progress['deleted_count']
+        )
+    
+    try:
+        result = contact_service.sync_contacts_from_google(
+            user_email,
+            progress_callback=on_page,
+            full_resync=full_resync,
+            service=service
+        )
+        db_service.update_sync_job(
+            job_id,
+            status='completed',
+            mode=result['mode'],
+            pages_fetched=result['pages_fetched'],
+            rows_written=result['synced_count'],
+            deleted_count=result['deleted_count'],
+            finished_at=datetime.now().isoformat()
+        )
+        logger.info(f"Sync job {job_id} completed: {result['synced_count']} contacts for {user_email}")
+    except Exception as e:
+        logger.error(f"Sync job {job_id} failed for {user_email}: {e}", exc_info=True)
+        db_service.update_sync_job(
+            job_id,
+            status='failed',
+            error=f"{type(e).__name__}: {str(e)[:200]}",
+            finished_at=datetime.now().isoformat()
+        )
@@ -44,7 +44,7 @@ class ContactsProvider with ChangeNotifier {
     try {
       final idToken = await _authProvider.getIdToken();
       final result = await _apiService.syncContacts(idToken);
-      _syncedCount = result['synced_count'] ?? 0;
+      _syncedCount = result['rows_written'] ?? 0;
       _lastSyncTime = DateTime.now();
 
       // Automatically load contacts needing fix after sync
@@ -8,6 +8,10 @@ class ApiService {
 
   ApiService({this.onAuthenticationExpired});
 
+  // Last ETag and body per URL, revalidated with If-None-Match
+  final Map<String, String> _etags = {};
+  final Map<String, String> _cachedBodies = {};
+
   // Use localhost for web, 10.0.2.2 for Android emulator
   // For physical device, use your computer's IP address
   static String get _baseUrl {
@@ -40,7 +44,30 @@ class ApiService {
     }
   }
 
+  /// GET that revalidates the cached copy of [uri] with If-None-Match.
+  /// A 304 (data unchanged since the last fetch) is answered from the cache
+  /// as a 200, so callers handle both the same way.
+  Future<http.Response> _getCached(Uri uri, Map<String, String> headers) async {
+    final key = uri.toString();
+    final etag = _etags[key];
+    final response = await http.get(
+      uri,
+      headers: {...headers, if (etag != null) 'If-None-Match': etag},
+    );
+
+    if (response.statusCode == 304 && _cachedBodies.containsKey(key)) {
+      return http.Response(_cachedBodies[key]!, 200, headers: response.headers);
+    }
+    final newEtag = response.headers['etag'];
+    if (response.statusCode == 200 && newEtag != null) {
+      _etags[key] = newEtag;
+      _cachedBodies[key] = response.body;
+    }
+    return response;
+  }
+
   /// Syncs contacts from Google to the local database.
+  /// The backend runs the sync as a background job; this polls until it finishes.
   Future<Map<String, dynamic>> syncContacts(String? idToken) async {
     final headers = await _getHeaders(idToken);
     final response = await http.post(
@@ -50,19 +77,46 @@ class ApiService {
 
     _handleResponse(response);
 
+    if (response.statusCode != 202 && response.statusCode != 200) {
+      throw Exception('Failed to sync contacts: ${response.statusCode}');
+    }
+
+    Map<String, dynamic> job = jsonDecode(response.body);
+    while (job['status'] == 'queued' || job['status'] == 'running') {
+      // 2s keeps polling at 30/minute, well under the route's 60/minute limit
+      await Future.delayed(const Duration(seconds: 2));
+      job = await getSyncJob(idToken, job['job_id']);
+    }
+
+    if (job['status'] == 'failed') {
+      throw Exception('Failed to sync contacts: ${job['errors']}');
+    }
+    return job;
+  }
+
+  /// Gets progress of a background sync job.
+  Future<Map<String, dynamic>> getSyncJob(String? idToken, String jobId) async {
+    final headers = await _getHeaders(idToken);
+    final response = await http.get(
+      Uri.parse('$_baseUrl/contacts/sync/$jobId'),
+      headers: headers,
+    );
+
+    _handleResponse(response);
+
     if (response.statusCode == 200) {
       return jsonDecode(response.body);
     } else {
-      throw Exception('Failed to sync contacts: ${response.statusCode}');
+      throw Exception('Failed to get sync status: ${response.statusCode}');
     }
   }
 
   /// Gets all contacts from the local database.
   Future<List<dynamic>> getContacts(String? idToken) async {
     final headers = await _getHeaders(idToken);
-    final response = await http.get(
+    final response = await _getCached(
       Uri.parse('$_baseUrl/contacts/'),
-      headers: headers,
+      headers,
     );
 
     _handleResponse(response);
@@ -80,9 +134,9 @@ class ApiService {
     String regionCode = 'US',
   }) async {
     final headers = await _getHeaders(idToken);
-    final response = await http.get(
+    final response = await _getCached(
       Uri.parse('$_baseUrl/contacts/missing_extension?region=$regionCode'),
-      headers: headers,
+      headers,
     );
 
     _handleResponse(response);
@@ -108,9 +162,9 @@ class ApiService {
   /// Analyzes contacts across multiple regions and returns counts.
   Future<Map<String, dynamic>> analyzeRegions(String? idToken) async {
     final headers = await _getHeaders(idToken);
-    final response = await http.get(
+    final response = await _getCached(
       Uri.parse('$_baseUrl/contacts/analyze_regions'),
-      headers: headers,
+      headers,
     );
 
     _handleResponse(response);
@@ -161,9 +215,9 @@ class ApiService {
   /// Get all pending staged changes.
   Future<Map<String, dynamic>> getPendingChanges(String? idToken) async {
     final headers = await _getHeaders(idToken);
-    final response = await http.get(
+    final response = await _getCached(
       Uri.parse('$_baseUrl/contacts/pending_changes'),
-      headers: headers,
+      headers,
     );
 
     _handleResponse(response);
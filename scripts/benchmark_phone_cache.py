@@ -0,0 +1,76 @@
+"""
+Phone Normalization Benchmark
+Measures the memoized parse/detect layer against uncached parsing on a
+Google Contacts CSV export.
+
+Usage: python scripts/benchmark_phone_cache.py [path/to/contacts.csv] [--rounds N]
+
+Each round runs what the app does per contact: country detection plus the
+analysis for every region checked by /contacts/analyze_regions. Later
+rounds stand in for repeated analyses and resyncs. Needs the same environment (.env) as the backend.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.services import phone_service
+
+REGIONS = ["IN", "US", "GB", "AU", "CA", "DE", "AE", "SG"]
+
+def load_numbers(path):
+    """All phone values in the export (multi-value cells use ' ::: ')."""
+    numbers = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for column, value in row.items():
+                if column and column.startswith('Phone') and column.endswith('Value') and value:
+                    numbers.extend(part.strip() for part in value.split(':::') if part.strip())
+    return numbers
+
+def run(numbers, rounds, parse, detect):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for number in numbers:
+            detect(number)
+            for region in REGIONS:
+                parse(number, region)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv_path', nargs='?', default=os.path.join(PROJECT_ROOT, 'docs', 'contacts.csv'))
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    numbers = load_numbers(args.csv_path)
+    print(f"{len(numbers)} numbers ({len(set(numbers))} distinct), "
+          f"{len(REGIONS)} regions, {args.rounds} rounds")
+    
+    uncached = run(
+        numbers, args.rounds,
+        phone_service._parse_e164.__wrapped__,
+        phone_service._detect_country_code_cached.__wrapped__
+    )
+    
+    phone_service.clear_caches()
+    cached = run(
+        numbers, args.rounds,
+        phone_service._parse_e164,
+        phone_service._detect_country_code_cached
+    )
+    
+    print(f"uncached: {uncached:.3f}s")
+    print(f"cached:   {cached:.3f}s ({uncached / cached:.1f}x faster)")
+    for name, stats in phone_service.cache_stats().items():
+        total = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total if total else 0
+        print(f"{name}: {stats['hits']} hits, {stats['misses']} misses "
+              f"({hit_rate:.1%} hit rate), {stats['size']}/{stats['max_size']} entries")
+
+if __name__ == '__main__':
+    main()
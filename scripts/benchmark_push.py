@@ -0,0 +1,118 @@
+"""
+Push Throughput Benchmark
+Pushes the same set of staged fixes through push_service against the
+fake People API (scripts/fake_people_service.py), once serially and once
+with the concurrent worker pool, and reports contacts/s and how many
+requests the fake had to reject for exceeding the write quota.
+
+Usage: python scripts/benchmark_push.py [--contacts N] [--batch-size N] [--workers N]
+       [--latency S] [--error-rate P] [--stale-rate P] [--quota N]
+
+The fake enforces the same per-minute quota the push paces itself to, so
+"quota rejections: 0" shows the token bucket keeps the pool inside it.
+Injected 429/503 errors exercise the backoff. Uses a throwaway SQLite
+database; needs the same environment (.env) as the backend.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.core.config import config
+from backend.services import db_service, push_service
+from fake_people_service import FakePeopleService
+
+def make_people(count):
+    """Contacts with a local-format US number each."""
+    return [
+        {
+            "resourceName": f"people/c{i:06d}",
+            "etag": f"etag{i}",
+            "names": [{"givenName": f"Contact {i}"}],
+            "phoneNumbers": [{"value": f"(650) 555-{i % 10000:04d}", "type": "mobile"}],
+            "metadata": {"sources": [{"updateTime": "2026-01-01T00:00:00Z"}]}
+        }
+        for i in range(count)
+    ]
+
+def make_changes(people):
+    return [
+        {
+            "resource_name": person['resourceName'],
+            "contact_name": person['names'][0]['givenName'],
+            "original_phone": person['phoneNumbers'][0]['value'],
+            "new_phone": "+1 650-555-" + person['phoneNumbers'][0]['value'][-4:],
+            "new_name": None,
+            "action": "accept"
+        }
+        for person in people
+    ]
+
+def run(label, people, workers, args):
+    """One push of every contact; returns elapsed seconds."""
+    user_email = f"bench-{label}@example.com"
+    db_service.save_contacts(people, user_email)
+
+    fake = FakePeopleService(
+        latency=args.latency,
+        jitter=args.latency / 2,
+        error_rate=args.error_rate,
+        quota_per_minute=args.quota,
+        retry_after=1,
+        seed=42
+    )
+    server_people = [dict(person) for person in people]
+    # Contacts edited on Google after the last sync: their stored etag is stale
+    stale = int(len(server_people) * args.stale_rate)
+    for person in server_people[:stale]:
+        person['etag'] += '-edited'
+    fake.add_people(server_people)
+
+    start = time.perf_counter()
+    results = push_service.push_staged_changes(
+        user_email, make_changes(people), service_factory=lambda: fake, workers=workers
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:>10}: {elapsed:6.2f}s, {len(people) / elapsed:8.1f} contacts/s, "
+          f"{len(results['success'])} pushed, {len(results['failed'])} failed, "
+          f"{fake.stats['requests']} requests ({fake.stats['injected_errors']} injected errors, "
+          f"{fake.stats['conflicts']} conflicts, quota rejections: {fake.stats['quota_errors']})")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--contacts', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=50, help="Contacts per batchUpdateContacts (max 200)")
+    parser.add_argument('--workers', type=int, default=config.PUSH_WORKERS)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds per fake request")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="Share of requests answered 429/503")
+    parser.add_argument('--stale-rate', type=float, default=0.02, help="Share of contacts with a stale etag")
+    parser.add_argument('--quota', type=int, default=600, help="Write requests per minute")
+    args = parser.parse_args()
+
+    config.PUSH_WRITE_QUOTA_PER_MINUTE = args.quota
+    config.PUSH_BACKOFF_BASE_SECONDS = args.latency
+    config.PUSH_BACKOFF_MAX_SECONDS = args.latency * 8
+    push_service.BATCH_UPDATE_MAX = min(args.batch_size, 200)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The import already opened this thread's connection on the app database
+        db_service.DB_FILE = os.path.join(tmp, 'benchmark.db')
+        db_service._local.conn = None
+        db_service.init_db()
+
+        people = make_people(args.contacts)
+        print(f"{args.contacts} contacts in batches of {push_service.BATCH_UPDATE_MAX}, "
+              f"{args.latency}s latency, {args.error_rate:.0%} injected 429/503, "
+              f"quota {args.quota}/minute")
+        serial = run('serial', people, 1, args)
+        pooled = run(f'{args.workers} workers', people, args.workers, args)
+        print(f"speedup: {serial / pooled:.1f}x")
+
+if __name__ == '__main__':
+    main()
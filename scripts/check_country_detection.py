@@ -0,0 +1,64 @@
+"""
+Country Detection Regression Check
+Compares detect_country_code (precompiled classifier) with the original
+trial parsing over a corpus built from a Google Contacts CSV export plus
+generated digit strings, and reports any disagreement and the speedup.
+
+Usage: python scripts/check_country_detection.py [path/to/contacts.csv] [--random N]
+
+Needs the same environment (.env) as the backend. Exits 1 on any mismatch.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.services import phone_service
+from benchmark_phone_cache import load_numbers
+
+def build_corpus(numbers, random_count):
+    """Export numbers, their common rewrites, and seeded random digit strings."""
+    corpus = set()
+    for number in numbers:
+        digits = ''.join(ch for ch in number if ch.isdigit())
+        corpus.update({number, digits, '0' + digits, digits.lstrip('0')})
+        if number.startswith('+'):
+            corpus.add(number[1:])
+    
+    rng = random.Random(0)
+    for _ in range(random_count):
+        length = rng.randint(1, 18)
+        corpus.add(''.join(rng.choice('0123456789') for _ in range(length)))
+    corpus.discard('')
+    return sorted(corpus)
+
+def timed(numbers, use_classifier):
+    start = time.perf_counter()
+    answers = [phone_service._detect_country_code(n, use_classifier=use_classifier) for n in numbers]
+    return answers, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv_path', nargs='?', default=os.path.join(PROJECT_ROOT, 'docs', 'contacts.csv'))
+    parser.add_argument('--random', type=int, default=20000)
+    args = parser.parse_args()
+    
+    corpus = build_corpus(load_numbers(args.csv_path), args.random)
+    expected, trial_seconds = timed(corpus, use_classifier=False)
+    actual, classifier_seconds = timed(corpus, use_classifier=True)
+    
+    mismatches = [(n, e, a) for n, e, a in zip(corpus, expected, actual) if e != a]
+    for number, old, new in mismatches[:20]:
+        print(f"MISMATCH {number!r}: trial parse {old}, classifier {new}")
+    
+    print(f"{len(corpus)} numbers, {len(mismatches)} mismatches")
+    print(f"trial parse: {trial_seconds:.3f}s")
+    print(f"classifier:  {classifier_seconds:.3f}s ({trial_seconds / classifier_seconds:.1f}x faster)")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
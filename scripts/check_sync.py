@@ -0,0 +1,134 @@
+"""
+Sync Job Check
+Runs a full sync, an incremental sync, and a sync with an expired token
+(which must fall back to a full sync) through the background job runner
+(sync_jobs) against the fake People API (scripts/fake_people_service.py),
+and checks that the local database ends up matching the fake's contacts,
+and that pages, written rows and deletions are reported as expected.
+
+Usage: python scripts/check_sync.py [--contacts N] [--edits N] [--deletes N] [--adds N]
+
+Uses a throwaway SQLite database; needs the same environment (.env) as the
+backend. Exits 1 on any failed check.
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.services import contact_service, db_service, sync_jobs
+from fake_people_service import FakePeopleService
+
+USER_EMAIL = "sync-check@example.com"
+
+def make_person(i, name=None):
+    return {
+        "resourceName": f"people/c{i:06d}",
+        "etag": f"etag{i}",
+        "names": [{"displayName": name or f"Contact {i}", "givenName": name or f"Contact {i}"}],
+        "phoneNumbers": [{"value": f"(650) 555-{i % 10000:04d}", "type": "mobile"}],
+        "metadata": {"sources": [{"updateTime": "2026-01-01T00:00:00Z"}]}
+    }
+
+def run_job(fake, full_resync=False, timeout=120):
+    """Submit a sync job and poll it until it finishes."""
+    job = sync_jobs.submit_sync_job(USER_EMAIL, full_resync=full_resync, service=fake)
+    deadline = time.monotonic() + timeout
+    while job['status'] in db_service.SYNC_JOB_ACTIVE_STATUSES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Sync job {job['job_id']} still {job['status']} after {timeout}s")
+        time.sleep(0.05)
+        job = sync_jobs.get_sync_job(job['job_id'], USER_EMAIL)
+    return job
+
+def local_names():
+    return {
+        contact['resource_name']: contact['given_name']
+        for contact in db_service.iter_contacts(USER_EMAIL, fields=('resource_name', 'given_name'))
+    }
+
+def remote_names(fake):
+    return {
+        resource_name: person['names'][0]['displayName']
+        for resource_name, person in fake.all_people().items()
+    }
+
+class Checker:
+    def __init__(self):
+        self.failures = 0
+
+    def expect(self, label, actual, expected):
+        ok = actual == expected
+        if not ok:
+            self.failures += 1
+        if isinstance(actual, dict):
+            differing = sum(actual.get(key) != expected.get(key) for key in actual.keys() | expected.keys())
+            shown, wanted = f"{len(actual)} contacts", f"{len(expected)} contacts, {differing} differ"
+        else:
+            shown, wanted = actual, expected
+        print(f"  [{'ok' if ok else 'FAIL'}] {label}: {shown}" + ("" if ok else f" (expected {wanted})"))
+
+    def expect_job(self, job, mode, pages, rows, deleted):
+        self.expect("status", job['status'], 'completed')
+        self.expect("mode", job['mode'], mode)
+        self.expect("pages fetched", job['pages_fetched'], pages)
+        self.expect("rows written", job['rows_written'], rows)
+        self.expect("deleted", job['deleted_count'], deleted)
+        if job['errors']:
+            print(f"  errors: {job['errors']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--contacts', type=int, default=2500)
+    parser.add_argument('--edits', type=int, default=10)
+    parser.add_argument('--deletes', type=int, default=5)
+    parser.add_argument('--adds', type=int, default=3)
+    args = parser.parse_args()
+
+    page_size = contact_service.SYNC_PAGE_SIZE
+    check = Checker()
+    fake = FakePeopleService(latency=0.01, seed=42)
+    fake.add_people([make_person(i) for i in range(args.contacts)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The import already opened this thread's connection on the app database
+        db_service.DB_FILE = os.path.join(tmp, 'check_sync.db')
+        db_service._local.conn = None
+        db_service.init_db()
+
+        print(f"Full sync of {args.contacts} contacts ({page_size} per page)")
+        job = run_job(fake)
+        check.expect_job(job, 'full', max(1, math.ceil(args.contacts / page_size)), args.contacts, 0)
+        check.expect("local contacts match Google", local_names(), remote_names(fake))
+        check.expect("sync token stored", db_service.get_sync_token(USER_EMAIL) is not None, True)
+
+        print(f"Incremental sync after {args.edits} edits, {args.deletes} deletes, {args.adds} adds")
+        for i in range(args.edits):
+            fake.update_person(f"people/c{i:06d}", names=make_person(i, f"Edited {i}")['names'])
+        for i in range(args.edits, args.edits + args.deletes):
+            fake.delete_person(f"people/c{i:06d}")
+        fake.add_people([make_person(args.contacts + i) for i in range(args.adds)])
+        changes = args.edits + args.deletes + args.adds
+        job = run_job(fake)
+        check.expect_job(job, 'incremental', max(1, math.ceil(changes / page_size)),
+                         args.edits + args.adds, args.deletes)
+        check.expect("local contacts match Google", local_names(), remote_names(fake))
+
+        print("Sync with an expired token after one more delete")
+        fake.delete_person(f"people/c{args.edits + args.deletes:06d}")
+        fake.expire_sync_tokens()
+        live = len(remote_names(fake))
+        job = run_job(fake)
+        check.expect_job(job, 'full', max(1, math.ceil(live / page_size)), live, 1)
+        check.expect("local contacts match Google", local_names(), remote_names(fake))
+
+    print(f"{check.failures} failed check(s)" if check.failures else "All checks passed")
+    sys.exit(1 if check.failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Fake People API
+In-memory stand-in for the Google People API client used by sync and
+push. It injects latency, random 429/503 answers and enforces a
+per-minute request quota, so push throughput can be measured (and the
+backoff exercised) without touching Google.
+
+Usage: pass `service_factory=lambda: fake` to push_service.push_staged_changes,
+or `service=fake` to sync_jobs.submit_sync_job.
+Only the calls the app makes are implemented, each returning a request
+with execute():
+- people().connections().list(): pages, nextSyncToken, incremental results
+  for a syncToken (deleted people included) and the EXPIRED_SYNC_TOKEN error
+- people().batchUpdateContacts() and people().getBatchGet()
+
+Edit the server side with add_people/update_person/delete_person and
+invalidate issued sync tokens with expire_sync_tokens.
+"""
+import collections
+import json
+import random
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+class FakePeopleService:
+    """Thread-safe fake; one instance can be shared by every push worker."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                 quota_per_minute: int = None, retry_after: int = None, seed: int = None):
+        """
+        Args:
+            latency: Seconds every request takes
+            jitter: Extra random latency, uniform(0, jitter) seconds
+            error_rate: Probability a request fails with 429 or 503 before doing anything
+            quota_per_minute: Requests allowed in any rolling minute; more are answered 429
+            retry_after: Retry-After seconds sent with 429s (None: no header)
+            seed: Seed for the injected errors and jitter
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.retry_after = retry_after
+        self.stats = {"requests": 0, "injected_errors": 0, "quota_errors": 0,
+                      "contacts_updated": 0, "conflicts": 0}
+        self._people = {}
+        # Change sequence: sync tokens remember the sequence they were issued at
+        self._seq = 0
+        self._modified = {}
+        self._deleted = {}
+        self._min_sync_seq = 0
+        self._page_snapshots = {}
+        self._window = collections.deque()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def add_people(self, people):
+        """Store people as Google would hold them (each needs resourceName and etag)."""
+        with self._lock:
+            for person in people:
+                self._people[person['resourceName']] = json.loads(json.dumps(person))
+                self._touch(person['resourceName'])
+
+    def update_person(self, resource_name: str, **fields):
+        """Edit a person on the server side (new etag, shows up in incremental syncs)."""
+        with self._lock:
+            person = self._people[resource_name]
+            person.update(json.loads(json.dumps(fields)))
+            self._touch(resource_name)
+            person['etag'] = f"{person['etag'].split('.')[0]}.{self._seq}"
+
+    def delete_person(self, resource_name: str):
+        """Delete a person on the server side (reported as deleted to incremental syncs)."""
+        with self._lock:
+            person = self._people.pop(resource_name)
+            self._touch(resource_name)
+            self._modified.pop(resource_name, None)
+            self._deleted[resource_name] = (self._seq, person['etag'])
+
+    def expire_sync_tokens(self):
+        """Make every sync token issued so far fail with EXPIRED_SYNC_TOKEN."""
+        with self._lock:
+            self._min_sync_seq = self._seq + 1
+
+    def _touch(self, resource_name: str):
+        """Record a change of a person (caller holds the lock)."""
+        self._seq += 1
+        self._modified[resource_name] = self._seq
+        self._deleted.pop(resource_name, None)
+
+    def get_person(self, resource_name: str):
+        """Current server-side copy of a person."""
+        with self._lock:
+            return json.loads(json.dumps(self._people[resource_name]))
+
+    def all_people(self):
+        """Current server-side copies of every person, keyed by resourceName."""
+        with self._lock:
+            return json.loads(json.dumps(self._people))
+
+    def people(self):
+        return _FakePeopleResource(self)
+
+    # ============= REQUEST PIPELINE =============
+
+    def _execute(self, handler):
+        with self._lock:
+            self.stats['requests'] += 1
+            over_quota = self._over_quota()
+            inject = self._random.random() < self.error_rate
+            status = self._random.choice((429, 503))
+            delay = self.latency + self._random.uniform(0, self.jitter)
+
+        if over_quota:
+            self._count('quota_errors')
+            raise self._http_error(429, 'RESOURCE_EXHAUSTED', 'Quota exceeded for write requests per minute')
+        time.sleep(delay)
+        if inject:
+            self._count('injected_errors')
+            if status == 429:
+                raise self._http_error(429, 'RESOURCE_EXHAUSTED', 'Injected quota error')
+            raise self._http_error(503, 'UNAVAILABLE', 'Injected backend error')
+        with self._lock:
+            return handler()
+
+    def _over_quota(self) -> bool:
+        """Rolling-minute quota check; only accepted requests count (caller holds the lock)."""
+        if not self.quota_per_minute:
+            return False
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= 60:
+            self._window.popleft()
+        if len(self._window) >= self.quota_per_minute:
+            return True
+        self._window.append(now)
+        return False
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _http_error(self, status_code: int, status: str, message: str, reason: str = None) -> HttpError:
+        headers = {'status': str(status_code)}
+        if status_code == 429 and self.retry_after is not None:
+            headers['retry-after'] = str(self.retry_after)
+        body = {"error": {"code": status_code, "message": message, "status": status}}
+        if reason:
+            body["error"]["details"] = [{
+                "@type": "type.googleapis.com/google.rpc.ErrorInfo",
+                "reason": reason,
+                "domain": "people.googleapis.com"
+            }]
+        return HttpError(httplib2.Response(headers), json.dumps(body).encode('utf-8'))
+
+    # ============= API CALLS (run under the lock) =============
+
+    def _list_connections(self, pageSize=100, syncToken=None, pageToken=None,
+                          requestSyncToken=False, **_):
+        if pageToken:
+            items, sync_seq = self._page_snapshots.pop(pageToken)
+        else:
+            sync_seq = self._seq
+            if syncToken:
+                since = int(syncToken.rsplit('-', 1)[1])
+                if since < self._min_sync_seq:
+                    raise self._http_error(
+                        400, 'FAILED_PRECONDITION',
+                        'Sync token is expired. Clear local cache and retry call without the sync token.',
+                        reason='EXPIRED_SYNC_TOKEN'
+                    )
+                items = [self._people[rn] for rn, seq in sorted(self._modified.items()) if seq > since and rn in self._people]
+                items += [
+                    {"resourceName": rn, "etag": etag, "metadata": {"deleted": True}}
+                    for rn, (seq, etag) in sorted(self._deleted.items()) if seq > since
+                ]
+            else:
+                items = [self._people[rn] for rn in sorted(self._people)]
+            items = json.loads(json.dumps(items))
+
+        response = {"connections": items[:pageSize], "totalPeople": len(self._people)}
+        rest = items[pageSize:]
+        if rest:
+            token = f"page-{len(self._page_snapshots)}-{self.stats['requests']}"
+            self._page_snapshots[token] = (rest, sync_seq)
+            response["nextPageToken"] = token
+        elif requestSyncToken:
+            response["nextSyncToken"] = f"sync-{sync_seq}"
+        return response
+
+    def _batch_update(self, body):
+        fields = body['updateMask'].split(',')
+        update_result = {}
+        for resource_name, update in body['contacts'].items():
+            person = self._people.get(resource_name)
+            if person is None:
+                update_result[resource_name] = {
+                    "httpStatusCode": 404,
+                    "status": {"code": 5, "message": "Contact not found"}
+                }
+                continue
+            if update.get('etag') != person['etag']:
+                self.stats['conflicts'] += 1
+                update_result[resource_name] = {
+                    "httpStatusCode": 400,
+                    "status": {"code": 9, "message": "Request person.etag is different than the current etag"}
+                }
+                continue
+            for field in fields:
+                person[field] = update.get(field, [])
+            self._touch(resource_name)
+            person['etag'] = f"{person['etag'].split('.')[0]}.{self._seq}"
+            self.stats['contacts_updated'] += 1
+            update_result[resource_name] = {
+                "person": json.loads(json.dumps(person)),
+                "httpStatusCode": 200
+            }
+        return {"updateResult": update_result}
+
+    def _batch_get(self, resource_names):
+        responses = []
+        for resource_name in resource_names:
+            person = self._people.get(resource_name)
+            response = {"requestedResourceName": resource_name, "httpStatusCode": 200 if person else 404}
+            if person:
+                response["person"] = json.loads(json.dumps(person))
+            else:
+                response["status"] = {"code": 5, "message": "Contact not found"}
+            responses.append(response)
+        return {"responses": responses}
+
+class _FakePeopleResource:
+    def __init__(self, service: FakePeopleService):
+        self._service = service
+
+    def connections(self):
+        return _FakeConnectionsResource(self._service)
+
+    def batchUpdateContacts(self, body):
+        return _FakeRequest(self._service, lambda: self._service._batch_update(body))
+
+    def getBatchGet(self, resourceNames, personFields=None):
+        return _FakeRequest(self._service, lambda: self._service._batch_get(resourceNames))
+
+class _FakeConnectionsResource:
+    def __init__(self, service: FakePeopleService):
+        self._service = service
+
+    def list(self, resourceName='people/me', **params):
+        return _FakeRequest(self._service, lambda: self._service._list_connections(**params))
+
+class _FakeRequest:
+    def __init__(self, service: FakePeopleService, handler):
+        self._service = service
+        self._handler = handler
+
+    def execute(self):
+        return self._service._execute(self._handler)